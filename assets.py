@@ -2,8 +2,66 @@ import pygame
 import os
 
 ASSET_DIR = "assets"
-if not os.path.exists(ASSET_DIR):
-    os.makedirs(ASSET_DIR)
+CAR_SIZE = (50, 85)
+ATLAS_ANGLE_STEP = 2 # Degrees between pre-rotated car frames
+SMOKE_SIZES = range(5, 13) # Matches the randint(5, 12) in simulation.drift_fx
+SMOKE_LIFE = 20 # Puffs start with at most this many frames to live
+
+def load_sprite(filename, scale_size=None):
+    path = os.path.join(ASSET_DIR, filename)
+    if os.path.exists(path):
+        try:
+            img = pygame.image.load(path).convert_alpha()
+            if scale_size: img = pygame.transform.scale(img, scale_size)
+            return img
+        except: pass
+    # Fallback
+    surf = pygame.Surface(scale_size if scale_size else (40,60), pygame.SRCALPHA)
+    pygame.draw.rect(surf, (0,0,255), surf.get_rect())
+    return surf
+
+class SpriteAtlas:
+    """Every car frame and smoke puff the renderer draws, built once per process.
+
+    Car bodies and their shadows are pre-rotated every ATLAS_ANGLE_STEP degrees for
+    both liveries; smoke puffs are pre-rendered for every (size, remaining life)
+    pair drift_fx can produce. Drawing is then lookups and blits, no per-frame
+    rotate or Surface allocation.
+    """
+    def __init__(self, step=ATLAS_ANGLE_STEP):
+        self.step = step
+        self.frames = {}
+        for leader, filename in ((False, "car_normal.png"), (True, "car_leader.png")):
+            img = load_sprite(filename, CAR_SIZE)
+            frames = []
+            for i in range(360 // step):
+                body = pygame.transform.rotate(img, i * step)
+                shadow = body.copy()
+                shadow.fill((0,0,0,80), special_flags=pygame.BLEND_RGBA_MULT)
+                frames.append((body, shadow))
+            self.frames[leader] = frames
+        self.puffs = {}
+        for size in SMOKE_SIZES:
+            for life in range(1, SMOKE_LIFE + 1):
+                s = pygame.Surface((size*2,size*2), pygame.SRCALPHA)
+                pygame.draw.circle(s, (200,200,200,int(life/SMOKE_LIFE*100)), (size,size), size)
+                self.puffs[size, life] = s
+
+    def car(self, angle, leader=False):
+        """(body, shadow) for a car heading `angle` degrees (simulation convention)."""
+        frames = self.frames[leader]
+        return frames[int(round((-angle - 90) / self.step)) % len(frames)]
+
+    def smoke(self, size, life):
+        return self.puffs[size, min(life, SMOKE_LIFE)]
+
+_ATLAS = None
+
+def get_atlas():
+    """The shared SpriteAtlas, built on first use (needs a display for convert_alpha)."""
+    global _ATLAS
+    if _ATLAS is None: _ATLAS = SpriteAtlas()
+    return _ATLAS
 
 def create_f1_sprite(color, filename):
     """Generates a high-res F1 car sprite."""
@@ -48,6 +106,8 @@ def generate_fx_assets():
     print("✨ Generated FX: Smoke")
 
 if __name__ == "__main__":
+    if not os.path.exists(ASSET_DIR):
+        os.makedirs(ASSET_DIR)
     pygame.init()
     create_f1_sprite((220, 0, 0), "car_leader.png") # Red
     create_f1_sprite((0, 0, 220), "car_normal.png") # Blue
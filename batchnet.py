@@ -0,0 +1,74 @@
+import numpy as np
+
+# Matches neat.activations.tanh_activation (the only activation create_config_file allows)
+def tanh(z):
+    return np.tanh(np.clip(2.5 * z, -60.0, 60.0))
+
+class BatchNetwork:
+    """A whole generation of feed-forward NEAT networks evaluated as one NumPy pass.
+
+    Every genome gets the same slot layout: inputs, then outputs, then its hidden
+    nodes, padded to the widest genome. Connections become a (N, K, K) weight tensor
+    and each feed-forward layer a (N, K) mask, so one activate() costs one batched
+    matmul per layer instead of a Python loop per node per car. Results match
+    neat.nn.FeedForwardNetwork.activate to float tolerance (only the sum order differs).
+    """
+    def __init__(self, weights, bias, response, layers, num_inputs, num_outputs):
+        self.weights = weights
+        self.bias = bias
+        self.response = response
+        self.layers = layers
+        self.num_inputs = num_inputs
+        self.num_outputs = num_outputs
+
+    @staticmethod
+    def create(genomes, config):
+        from neat.graphs import feed_forward_layers # Only building needs neat; champion.load() doesn't
+        gc = config.genome_config
+        inputs, outputs = gc.input_keys, gc.output_keys
+        slots = []
+        for g in genomes:
+            hidden = sorted(k for k in g.nodes if k not in outputs)
+            slots.append({k: i for i, k in enumerate(list(inputs) + list(outputs) + hidden)})
+
+        n, k = len(genomes), max([len(s) for s in slots] or [len(inputs) + len(outputs)])
+        weights = np.zeros((n, k, k))
+        bias = np.zeros((n, k))
+        response = np.zeros((n, k))
+        masks = []
+        for row, (g, slot) in enumerate(zip(genomes, slots)):
+            connections = [cg.key for cg in g.connections.values() if cg.enabled]
+            layers = feed_forward_layers(inputs, outputs, connections)
+            for depth, layer in enumerate(layers):
+                if depth == len(masks): masks.append(np.zeros((n, k), dtype=bool))
+                for node in layer:
+                    ng = g.nodes[node]
+                    if ng.activation != "tanh" or ng.aggregation != "sum":
+                        raise ValueError(f"BatchNetwork only supports tanh/sum nodes, got {ng.activation}/{ng.aggregation}")
+                    masks[depth][row, slot[node]] = True
+                    bias[row, slot[node]] = ng.bias
+                    response[row, slot[node]] = ng.response
+            for i, o in connections:
+                # Links into nodes no layer evaluates are harmless: those slots are never written
+                weights[row, slot[i], slot[o]] = g.connections[(i, o)].weight
+        return BatchNetwork(weights, bias, response, masks, len(inputs), len(outputs))
+
+    def copy(self):
+        """A network that compact() can shrink without touching this one (the arrays are shared, never written)."""
+        return BatchNetwork(self.weights, self.bias, self.response, list(self.layers), self.num_inputs, self.num_outputs)
+
+    def compact(self, keep):
+        """Keep only rows `keep` (e.g. after CarFleet.compact), in place."""
+        self.weights = self.weights[keep]
+        self.bias = self.bias[keep]
+        self.response = self.response[keep]
+        self.layers = [m[keep] for m in self.layers]
+
+    def activate(self, inputs):
+        """(N, num_inputs) array in, (N, num_outputs) array out."""
+        values = np.zeros(self.bias.shape)
+        values[:, :self.num_inputs] = inputs
+        for mask in self.layers:
+            s = np.matmul(values[:, None, :], self.weights)[:, 0]
+            values = np.where(mask, tanh(self.bias + self.response * s), values)
+        return values[:, self.num_inputs:self.num_inputs + self.num_outputs]
@@ -0,0 +1,247 @@
+import os
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1" # stdout is the JSON report, from every workload process
+
+import sys
+import json
+import time
+import random
+import argparse
+import resource
+import multiprocessing
+import tempfile
+import tracemalloc
+import numpy as np
+import neat
+import pygame
+import simulation
+import batchnet
+import render
+import brain
+
+# Fixed-seed workloads for the hot paths, reported as JSON so runs can be diffed across commits:
+#   python bench.py --cars 40 200 1000 --json bench.json
+# Each workload runs in a fresh process, so its peak RSS is its own.
+WORKLOADS = ["track", "physics", "radar", "inference", "draw", "capture", "generation"]
+SEED = 42
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def measure(name, cars, frames, run):
+    """Time run() once, then again under tracemalloc for Python allocation stats.
+
+    run() returns the number of car-steps it did when that isn't simply cars * frames
+    (e.g. cars dying along the way). rss_growth_mb is how far the timed run pushed
+    the process's peak RSS past where it stood before.
+    """
+    rss_before = peak_rss_mb()
+    t = time.perf_counter()
+    steps = run()
+    seconds = time.perf_counter() - t
+    rss_after = peak_rss_mb()
+    tracemalloc.start()
+    run()
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    steps = steps or cars * frames
+    return {"workload": name, "cars": cars, "frames": frames, "seconds": round(seconds, 4),
+            "fps": round(frames / seconds, 1) if frames else None,
+            "us_per_car_step": round(seconds / steps * 1e6, 2) if steps else None,
+            "peak_rss_mb": round(rss_after, 1), "rss_growth_mb": round(rss_after - rss_before, 1),
+            "py_alloc_peak_kb": round(peak / 1024, 1), "py_alloc_retained_kb": round(current / 1024, 1),
+            "py_alloc_retained_blocks": blocks}
+
+def make_genomes(config, n, mutations=5):
+    """n seeded genomes with a bit of structure, so networks aren't all the bare initial layout."""
+    random.seed(SEED)
+    genomes = []
+    for key in range(n):
+        g = config.genome_type(key)
+        g.configure_new(config.genome_config)
+        for _ in range(mutations): g.mutate(config.genome_config)
+        genomes.append(g)
+    return genomes
+
+def pygame_mask(mask):
+    """pygame.mask.Mask with the same bits as a simulation.mask_array, for the scalar Car paths."""
+    rgb = np.repeat((mask[:, :, None] * 255).astype(np.uint8), 3, axis=2)
+    return pygame.mask.from_threshold(pygame.surfarray.make_surface(rgb), (255, 255, 255), (1, 1, 1, 255))
+
+def random_steering(n, frames):
+    rng = np.random.default_rng(SEED)
+    return rng.choice([-1.0, 0.0, 1.0], size=(frames, n), p=[0.2, 0.6, 0.2])
+
+def bench_track(cars, frames, ctx):
+    def run():
+        simulation.TrackGenerator(seed=SEED).generate_track()
+    return measure("track.generate_track", 0, 0, run)
+
+def bench_physics(cars, frames, ctx):
+    track, steer = ctx["track"], random_steering(cars, frames)
+    def scalar():
+        fleet = [simulation.Car(track.start_pos, track.start_angle) for _ in range(cars)]
+        steps = 0
+        for f in range(frames):
+            for i, c in enumerate(fleet):
+                if not c.alive: continue
+                c.steering = steer[f, i]
+                c.input_gas()
+                c.update(ctx["map_mask"])
+                steps += 1
+        return steps
+    def vectorized():
+        fleet = simulation.CarFleet(cars, track.start_pos, track.start_angle)
+        steps = 0
+        for f in range(frames):
+            steps += int(fleet.alive.sum())
+            fleet.steering[:] = steer[f]
+            fleet.acceleration[:] = 1.0
+            fleet.update(track.mask)
+        return steps
+    return [measure("physics.Car.update", cars, frames, scalar),
+            measure("physics.CarFleet.update", cars, frames, vectorized)]
+
+def bench_radar(cars, frames, ctx):
+    track = ctx["track"]
+    rng = np.random.default_rng(SEED)
+    # Cars scattered along the centre line, pointing every which way
+    gates = np.array(track.checkpoints)
+    fleet = simulation.CarFleet(cars, track.start_pos, track.start_angle)
+    fleet.position[:] = gates[rng.integers(0, len(gates), cars)] + rng.normal(0, 40, (cars, 2))
+    fleet.angle[:] = rng.uniform(0, 360, cars)
+    def scalar():
+        for _ in range(frames):
+            for c in fleet.cars: c.check_radar(ctx["map_mask"])
+    def vectorized():
+        for _ in range(frames): fleet.check_radar(track.distance_field)
+    return [measure("radar.Car.check_radar", cars, frames, scalar),
+            measure("radar.CarFleet.check_radar", cars, frames, vectorized)]
+
+def bench_inference(cars, frames, ctx):
+    config, genomes = ctx["config"], ctx["genomes"][:cars]
+    inputs = np.random.default_rng(SEED).uniform(0, 1, (cars, 7))
+    def scalar():
+        nets = [neat.nn.FeedForwardNetwork.create(g, config) for g in genomes]
+        rows = inputs.tolist()
+        for _ in range(frames):
+            for net, x in zip(nets, rows): net.activate(x)
+    def batched():
+        net = batchnet.BatchNetwork.create(genomes, config)
+        for _ in range(frames): net.activate(inputs)
+    return [measure("inference.FeedForwardNetwork.activate", cars, frames, scalar),
+            measure("inference.BatchNetwork.activate", cars, frames, batched)]
+
+def bench_draw(cars, frames, ctx):
+    track, screen = ctx["track"], ctx["screen"]
+    camera = simulation.Camera(simulation.WORLD_SIZE, simulation.WORLD_SIZE)
+    rng = np.random.default_rng(SEED)
+    fleet = simulation.CarFleet(cars, track.start_pos, track.start_angle)
+    # Everyone on screen around the start, some of them smoking: the worst case
+    fleet.position += rng.normal(0, 300, (cars, 2))
+    fleet.angle[:] = rng.uniform(0, 360, cars)
+    camera.update(fleet.cars[0])
+    spots = [c.position for c in fleet.cars]
+    def run():
+        for _ in range(frames):
+            # Fresh puffs every frame: draw() ages and drops them, so the smoke never runs out
+            for c, pos in zip(fleet.cars, spots): c.particles = [[pos, 20, 8] for _ in range(3)]
+            for c in fleet.cars: c.draw(screen, camera)
+    return measure("draw.Car.draw", cars, frames, run)
+
+def bench_capture(cars, frames, ctx):
+    track, screen = ctx["track"], ctx["screen"]
+    camera = simulation.Camera(simulation.WORLD_SIZE, simulation.WORLD_SIZE)
+    world = render.WorldView(track.visual_map)
+    font = pygame.font.SysFont("consolas", 40, bold=True)
+    fleet = simulation.CarFleet(cars, track.start_pos, track.start_angle)
+    camera.update(fleet.cars[0])
+    results = []
+    for tier in ctx["tiers"]:
+        spec = render.RENDER_TIERS[tier]
+        detail = render.lod(fleet.progress, fleet.alive, spec["top_k"])
+        def run():
+            with tempfile.TemporaryDirectory() as tmp:
+                encoder = render.FrameEncoder(os.path.join(tmp, "bench.mp4"), size=render.tier_size(tier))
+                for _ in range(frames):
+                    render.draw_frame(screen, camera, world, fleet.cars, "BENCH", font, detail)
+                    encoder.submit(screen)
+                encoder.close()
+        r = measure("capture.draw_frame+FrameEncoder", cars, frames, run)
+        r.update(tier=tier, top_k=spec["top_k"])
+        results.append(r)
+    return results
+
+def bench_generation(cars, frames, ctx):
+    config, genomes, track = ctx["config"], ctx["genomes"][:cars], ctx["track"]
+    results = []
+    for k in ctx["intervals"]:
+        brain.DECISION_INTERVAL_TRAINING = brain.DECISION_INTERVAL_PRO = k
+        fitness = []
+        def run():
+            fitness[:] = brain.eval_genomes(genomes, config, frames, track)
+        # Nominal car-steps: cars that crash early or retire make this an upper bound
+        r = measure("generation.eval_genomes", cars, frames, run)
+        # What the interval does to scores, not just to speed
+        r.update(decision_interval=k, fitness_mean=round(float(np.mean(fitness)), 1), fitness_max=max(fitness))
+        results.append(r)
+    return results
+
+BENCHES = {"track": bench_track, "physics": bench_physics, "radar": bench_radar, "inference": bench_inference,
+           "draw": bench_draw, "capture": bench_capture, "generation": bench_generation}
+
+def run_workload(name, cars, frames, max_cars, intervals, tiers):
+    """One workload at one population size, with everything it needs built from scratch."""
+    pygame.init()
+    screen = pygame.display.set_mode((simulation.WIDTH, simulation.HEIGHT))
+    brain.create_config_file()
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation, "config.txt")
+    track = simulation.load_track(SEED)
+    ctx = {"screen": screen, "config": config, "track": track, "intervals": intervals, "tiers": tiers}
+    if name in ("inference", "generation"): ctx["genomes"] = make_genomes(config, max_cars)
+    if name in ("physics", "radar"): ctx["map_mask"] = pygame_mask(np.asarray(track.mask))
+    out = BENCHES[name](cars, frames, ctx)
+    return out if isinstance(out, list) else [out]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation/sensing/inference/render hot paths.")
+    parser.add_argument("--cars", type=int, nargs="+", default=[40], help="population sizes to run (e.g. 40 200 1000)")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--only", nargs="+", choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument("--intervals", type=int, nargs="+", default=[1], help="decision intervals for the generation workload (e.g. 1 2 4)")
+    parser.add_argument("--tiers", nargs="+", default=["draft", "full"], choices=["draft", "full"], help="render tiers for the capture workload")
+    parser.add_argument("--in-process", action="store_true", help="run every workload in this process (peak_rss_mb is then cumulative)")
+    parser.add_argument("--json", help="write results here as well as stdout")
+    args = parser.parse_args()
+
+    simulation.load_track(SEED) # Fill the track cache once, not in every workload process
+    results = []
+    for name in args.only:
+        for cars in ([0] if name == "track" else args.cars):
+            job = (name, cars, args.frames, max(args.cars), args.intervals, args.tiers)
+            if args.in_process: out = run_workload(*job)
+            else:
+                # spawn: a clean interpreter per workload, so ru_maxrss starts from scratch
+                pool = multiprocessing.get_context("spawn").Pool(1)
+                try: out = pool.apply(run_workload, job)
+                finally: # close/join, not terminate: SDL swallows the SIGTERM (see brain._init_worker)
+                    pool.close()
+                    pool.join()
+            for r in out:
+                extra = f"  k={r['decision_interval']} fitness mean/max {r['fitness_mean']}/{r['fitness_max']}" if "decision_interval" in r else ""
+                if "tier" in r: extra = f"  tier={r['tier']} top_k={r['top_k']}"
+                print(f"⏱️ {r['workload']:<38} cars={r['cars']:<5} {r['seconds']:>8.3f}s  "
+                      f"{r['us_per_car_step'] or 0:>9.2f} us/car-step  rss={r['peak_rss_mb']}MB (+{r['rss_growth_mb']}){extra}", file=sys.stderr)
+                results.append(r)
+            if name == "track": break
+
+    report = {"seed": SEED, "frames": args.frames, "python": sys.version.split()[0],
+              "numpy": np.__version__, "pygame": pygame.version.ver, "results": results}
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w") as f: json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
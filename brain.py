@@ -5,13 +5,26 @@ os.environ["SDL_AUDIODRIVER"] = "dummy"
 import sys
 import glob
 import pickle
-import imageio
+import argparse
 import numpy as np
 import neat
-import pygame
 import json
+import time
 import random
-import simulation 
+import hashlib
+import multiprocessing
+import phases
+import checkpoint
+import champion
+import clips
+import lazy
+
+# Deferred until something simulates or draws, so writing the config or resuming starts fast
+pygame = lazy.lazy_import("pygame")
+simulation = lazy.lazy_import("simulation")
+batchnet = lazy.lazy_import("batchnet")
+render = lazy.lazy_import("render")
+HEAVY_IMPORTS = ["pygame", "simulation", "batchnet", "scipy.spatial", "scipy.interpolate", "scipy.ndimage", "render", "imageio"]
 
 # CONFIG
 DAILY_GENERATIONS = 20  
@@ -19,8 +32,35 @@ VIDEO_OUTPUT_DIR = "training_clips"
 FPS = 30 
 MAX_FRAMES_PRO = 1800 
 MAX_FRAMES_TRAINING = 450 
+TRACK_SEED = 42 # The track that gets filmed (and the only one, by default)
+EVAL_TRACKS = int(os.environ.get("BRAIN_TRACKS", "1")) # >1 = fitness is the mean over this many seeded tracks
+TRACK_SEEDS = [TRACK_SEED + i for i in range(EVAL_TRACKS)]
+WORKERS = int(os.environ.get("BRAIN_WORKERS", "1")) # >1 = evaluate headless gens in a process pool
+HEADLESS_TRAINING = os.environ.get("BRAIN_HEADLESS", "1") != "0" # 0 = keep the every-10th-frame preview
+RECORD_MODE = os.environ.get("BRAIN_RECORD", "replay") # replay = log now, render after training | inline
+RENDER_WORKERS = int(os.environ.get("BRAIN_RENDER_WORKERS", "1"))
+MILESTONE_TIER = os.environ.get("BRAIN_MILESTONE_TIER", "draft") # Every-10th-gen clips: none | draft | full (first + final are always full)
+REPLAYS = [] # Replay logs written this run, rendered once training is done
+FITNESS_CACHE_FILE = os.environ.get("BRAIN_FITNESS_CACHE", "fitness_cache.json") # "" = off
+FITNESS_CACHE_SIZE = 5000
+ADAPTIVE_BUDGET = os.environ.get("BRAIN_ADAPTIVE_BUDGET", "0") == "1" # Let cars still passing gates run past max_frames
+ADAPTIVE_FACTOR = 2 # ...up to this many times the base budget
+ADAPTIVE_WINDOW = 45 # ...as long as their last gate was at most this many frames ago
+COMPACT_MIN = 8 # Smaller fleets aren't worth compacting
+DECISION_INTERVAL_TRAINING = int(os.environ.get("BRAIN_DECISION_INTERVAL", "1")) # Sense + think every k frames, hold the action between
+DECISION_INTERVAL_PRO = int(os.environ.get("BRAIN_DECISION_INTERVAL_PRO", "1")) # ...same for the MAX_FRAMES_PRO finale
+PROGRESS_BONUS = float(os.environ.get("BRAIN_PROGRESS_BONUS", "0")) # Fitness per px driven along the centerline; 0 = gates only
+PROFILE_FILE = os.environ.get("BRAIN_PROFILE", "") # e.g. phases.csv / phases.jsonl; "" = phase timers off
+TIMER = phases.PhaseTimer(enabled=bool(PROFILE_FILE))
+CHECKPOINT_DIR = "checkpoints"
+CHECKPOINT_EVERY = 5
+CHECKPOINT_KEEP = 3 # Newest checkpoints kept...
+CHECKPOINT_MILESTONE = 50 # ...plus every this-many generations
+CHECKPOINT_BACKGROUND = os.environ.get("BRAIN_CHECKPOINT_BG", "1") != "0" # Compress + write off the generation loop
+CHAMPION_FILE = champion.CHAMPION_FILE # Top drivers of the run as plain arrays (see champion.py)
 
 if not os.path.exists(VIDEO_OUTPUT_DIR): os.makedirs(VIDEO_OUTPUT_DIR)
+CLIPS = clips.ClipLibrary(VIDEO_OUTPUT_DIR)
 
 def create_config_file():
     # YOUR STABLE CONFIG (Safety Params Added)
@@ -100,17 +140,11 @@ min_species_size   = 2
 def run_dummy_generation():
     if len(glob.glob("neat-checkpoint-*")) > 0: return
     print("\n--- 🤡 Running Dummy Gen 0 ---")
-    pygame.init()
-    screen = pygame.display.set_mode((simulation.WIDTH, simulation.HEIGHT))
-    map_gen = simulation.TrackGenerator(seed=42)
-    
-    # UNPACK 6 ITEMS (Includes Skid Map)
-    start_pos, track_surface, visual_map, skid_map, checkpoints, start_angle = map_gen.generate_track()
-    
-    map_mask = pygame.mask.from_surface(track_surface)
-    camera = simulation.Camera(simulation.WORLD_SIZE, simulation.WORLD_SIZE)
-    cars = [simulation.Car(start_pos, start_angle) for _ in range(40)]
-    writer = imageio.get_writer(os.path.join(VIDEO_OUTPUT_DIR, "gen_00000.mp4"), fps=FPS)
+    session = render.session(simulation.load_track(TRACK_SEED))
+    screen, world, camera, track = session.screen, session.world, session.camera, session.track
+    fleet = session.start(40)
+    cars = fleet.cars
+    encoder = render.FrameEncoder(os.path.join(VIDEO_OUTPUT_DIR, clips.clip_name(0)), FPS)
 
     for i in range(300):
         alive = [c for c in cars if c.alive]
@@ -121,137 +155,417 @@ def run_dummy_generation():
             if c.alive:
                 if random.random() < 0.1: c.steering = random.choice([-1, 0, 1])
                 c.input_gas()
-                c.update(map_mask, skid_map)
+        fleet.update(track.mask, world.surface)
         
         screen.fill(simulation.THEME["bg"])
-        # Simple Blit (No fancy clamping)
-        screen.blit(visual_map, (camera.camera.x, camera.camera.y))
-        screen.blit(skid_map, (camera.camera.x, camera.camera.y))
+        world.blit(screen, camera)
         for c in cars: c.draw(screen, camera)
         
         pygame.display.flip()
-        try: writer.append_data(np.transpose(pygame.surfarray.array3d(screen), (1, 0, 2)))
-        except: pass
-    writer.close()
+        encoder.submit(screen)
+    CLIPS.add(encoder.path, 0, encoder.close() / FPS, encoder.size)
 
 START_GEN = 0
 FINAL_GEN = 0
 GENERATION = 0
 
+def render_tier(gen):
+    """render.RENDER_TIERS key for a generation's clip: full for the first and final, MILESTONE_TIER every 10th."""
+    if gen == START_GEN + 1 or gen >= FINAL_GEN: return "full"
+    return MILESTONE_TIER if gen % 10 == 0 else "none"
+
+def should_record(gen):
+    return render_tier(gen) != "none"
+
+def frame_budget(gen):
+    return MAX_FRAMES_PRO if gen >= FINAL_GEN else MAX_FRAMES_TRAINING
+
+def frame_cap(max_frames):
+    return max_frames * ADAPTIVE_FACTOR if ADAPTIVE_BUDGET else max_frames
+
+def decision_interval(max_frames):
+    """Frames per network decision. Keyed off the budget so pool workers agree with the parent."""
+    return DECISION_INTERVAL_PRO if max_frames >= MAX_FRAMES_PRO else DECISION_INTERVAL_TRAINING
+
+def budget(max_frames):
+    """Everything about the frame budget a fitness depends on (for the fitness cache)."""
+    key = (max_frames, ADAPTIVE_FACTOR, ADAPTIVE_WINDOW) if ADAPTIVE_BUDGET else (max_frames,)
+    k = decision_interval(max_frames)
+    return key + (("decide", k),) if k > 1 else key
+
+def keep_driving(fleet, frame, max_frames):
+    """Retire cars that ran out of budget; False once nobody is left driving.
+
+    The adaptive extension is decided per car (not by watching the leader) so a
+    car's fitness never depends on the rest of the population: pool chunks and
+    the fitness cache stay exact. Retiring isn't crashing, so there's no penalty.
+    """
+    if frame >= max_frames: fleet.alive &= fleet.frames_since_gate <= ADAPTIVE_WINDOW
+    return fleet.alive.any()
+
+def leader_index(fleet, track):
+    """Fleet row of the alive car furthest along the track."""
+    return np.argmax(np.where(fleet.alive, fleet.check_progress(track.centerline), -np.inf))
+
+def compact(fleet, net, rows):
+    """Once half the cars are dead, drop them from the fleet and the network. Returns the new row -> genome map."""
+    if fleet.n < COMPACT_MIN or fleet.alive.sum() > fleet.n // 2: return rows
+    keep = fleet.compact()
+    net.compact(keep)
+    return rows[keep]
+
+# --- FITNESS CACHE ---
+# Same genome + same track + same frame budget = same fitness, so elites carried over
+# by DefaultReproduction (and clones) don't need driving again. Bump the version
+# whenever physics, sensing or scoring changes.
+FITNESS_CACHE_VERSION = 1
+
+class FitnessCache:
+    def __init__(self, path=FITNESS_CACHE_FILE, size=FITNESS_CACHE_SIZE):
+        self.path = path
+        self.size = size
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f: data = json.load(f)
+                if data.get("version") == FITNESS_CACHE_VERSION: self.entries = data["entries"]
+            except (OSError, ValueError, KeyError): pass
+
+    @staticmethod
+    def key(genome, *context):
+        """Structural hash: every node/connection gene value, plus whatever the run depends on."""
+        nodes = sorted((k, n.bias, n.response, n.activation, n.aggregation) for k, n in genome.nodes.items())
+        conns = sorted((k, c.weight, c.enabled) for k, c in genome.connections.items())
+        return hashlib.sha1(repr((FITNESS_CACHE_VERSION, context, nodes, conns)).encode()).hexdigest()
+
+    def lookup(self, genomes, *context):
+        """Assign cached fitness where known. Returns {key: [genomes]} still needing a drive."""
+        todo = {}
+        for g in genomes:
+            k = self.key(g, *context)
+            if k in self.entries: g.fitness = self.entries[k]
+            else: todo.setdefault(k, []).append(g)
+        return todo
+
+    def store(self, todo):
+        """Record the fitness of the first genome per key (set by the caller) on all its clones."""
+        for k, gs in todo.items():
+            for g in gs[1:]: g.fitness = gs[0].fitness
+            self.entries.pop(k, None)
+            self.entries[k] = gs[0].fitness
+        for k in list(self.entries)[:max(0, len(self.entries) - self.size)]: del self.entries[k]
+
+    def save(self):
+        if not self.path: return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f: json.dump({"version": FITNESS_CACHE_VERSION, "entries": self.entries}, f)
+        os.replace(tmp, self.path)
+
+FITNESS_CACHE = FitnessCache()
+
+def tracks():
+    """The evaluation tracks, as cache context (one track keys exactly as it always has)."""
+    return TRACK_SEED if len(TRACK_SEEDS) == 1 else tuple(TRACK_SEEDS)
+
+def scoring():
+    """Scoring options beyond gates/crashes, as cache context (none by default)."""
+    return ("progress", PROGRESS_BONUS) if PROGRESS_BONUS else ()
+
+def remember_fitness(genomes, max_frames):
+    """Teach the cache fitnesses that were scored without it (recorded generations)."""
+    FITNESS_CACHE.store({FITNESS_CACHE.key(g, tracks(), *budget(max_frames), *scoring()): [g] for g in genomes})
+    FITNESS_CACHE.save()
+
+def cached_drive(genomes, max_frames, evaluate):
+    """Fill in genome fitness via the cache, calling evaluate(list_of_genomes) -> fitnesses for the rest."""
+    TIMER.mark()
+    todo = FITNESS_CACHE.lookup(genomes, tracks(), *budget(max_frames), *scoring())
+    unique = [gs[0] for gs in todo.values()]
+    if len(unique) < len(genomes): print(f"♻️ Fitness cache: {len(genomes) - len(unique)}/{len(genomes)} genomes skipped")
+    TIMER.lap("cache")
+    for g, fitness in zip(unique, evaluate(unique)): g.fitness = fitness
+    TIMER.mark()
+    FITNESS_CACHE.store(todo)
+    FITNESS_CACHE.save()
+    TIMER.lap("cache")
+
+def drive(fleet, net, track, skid_map=None, decide=True):
+    """One frame of sense -> think -> act for the whole fleet. `net` is a batchnet.BatchNetwork.
+
+    With decide=False radars and networks are skipped and every car repeats the
+    steering it applied last frame. Returns per-car fitness deltas.
+    """
+    TIMER.mark()
+    active = fleet.alive.copy()
+    if decide:
+        # 5 Radars + Speed + 0 (GPS slot, unused) = the 7 inputs the config expects.
+        inputs = np.zeros((fleet.n, 7))
+        inputs[:, :5] = fleet.check_radar(track.distance_field) / simulation.SENSOR_LENGTH
+        inputs[:, 5] = fleet.speed / 30.0
+        TIMER.lap("sensing")
+    # Pre-move gate check is unrewarded on purpose: every fitness so far was scored this way.
+    fleet.check_gates(track.checkpoints)
+    TIMER.lap("gates")
+    if decide:
+        steer = net.activate(inputs)[:, 0]
+        TIMER.lap("inference")
+        fleet.steering[active & (steer > 0.5)] = 1
+        fleet.steering[active & (steer < -0.5)] = -1
+    else: fleet.steering[active] = fleet.last_steering[active]
+    fleet.acceleration[active] = 1.0
+    was_alive = fleet.alive.copy()
+    fleet.update(track.mask, skid_map)
+    TIMER.lap("physics")
+
+    delta = np.zeros(fleet.n)
+    delta[fleet.check_gates(track.checkpoints)] += 200
+    delta[was_alive & ~fleet.alive] -= 50
+    if PROGRESS_BONUS:
+        # Continuous signal between gates: reward ground covered along the centerline
+        before = fleet.progress.copy()
+        delta[was_alive] += PROGRESS_BONUS * (fleet.check_progress(track.centerline) - before)[was_alive]
+    TIMER.lap("gates")
+    return delta
+
 def run_simulation(genomes, config):
     global GENERATION
     GENERATION += 1
     print(f"\n--- 🏁 Gen {GENERATION} ---")
 
-    nets = []
-    cars = []
+    TIMER.mark()
     ge = []
-
-    pygame.init()
-    screen = pygame.display.set_mode((simulation.WIDTH, simulation.HEIGHT))
-    map_gen = simulation.TrackGenerator(seed=42)
-    start_pos, track_surface, visual_map, skid_map, checkpoints, start_angle = map_gen.generate_track()
-    map_mask = pygame.mask.from_surface(track_surface)
-    camera = simulation.Camera(simulation.WORLD_SIZE, simulation.WORLD_SIZE)
-
     for _, g in genomes:
-        net = neat.nn.FeedForwardNetwork.create(g, config)
-        nets.append(net)
-        cars.append(simulation.Car(start_pos, start_angle)) 
         g.fitness = 0
         ge.append(g)
+    track = simulation.load_track(TRACK_SEED)
+    max_frames = frame_budget(GENERATION)
+    TIMER.lap("setup")
+
+    # HEADLESS: physics + networks only. No display, no visual/skid layers, no sprites, no smoke.
+    # Recorded gens in replay mode run the same way and just log poses for render.py.
+    if should_record(GENERATION) and RECORD_MODE == "replay":
+        # Every car has to be on screen, so nobody is skipped; the cache just learns from it
+        replay = render.ReplayRecorder(len(ge), frame_cap(max_frames))
+        filmed = eval_genomes(ge, config, max_frames, track, replay)
+        for g, fitness in zip(ge, eval_tracks(ge, config, max_frames, filmed)):
+            g.fitness = fitness
+        TIMER.mark()
+        remember_fitness(ge, max_frames)
+        TIMER.lap("cache")
+        os.makedirs(render.REPLAY_DIR, exist_ok=True)
+        tier = render_tier(GENERATION)
+        REPLAYS.append(replay.save(render.replay_path(GENERATION), TRACK_SEED, GENERATION, tier, max(g.fitness for g in ge)))
+        TIMER.lap("capture")
+        return
+    if HEADLESS_TRAINING and not should_record(GENERATION):
+        cached_drive(ge, max_frames, lambda todo: eval_tracks(todo, config, max_frames))
+        return
 
-    writer = None
-    if GENERATION == START_GEN + 1 or GENERATION % 10 == 0 or GENERATION >= FINAL_GEN:
-        filename = f"gen_{GENERATION:05d}.mp4"
-        writer = imageio.get_writer(os.path.join(VIDEO_OUTPUT_DIR, filename), fps=FPS)
+    TIMER.mark()
+    net = batchnet.BatchNetwork.create(ge, config)
+    rows = np.arange(len(ge)) # fleet row -> genome, as the fleet gets compacted
+    TIMER.lap("networks")
+
+    # Display, font, world and fleet are built once per run and reset here
+    session = render.session(track)
+    fleet = session.start(len(ge))
+    world, camera = session.world, session.camera
+
+    encoder = None
+    tier = render_tier(GENERATION)
+    if should_record(GENERATION):
+        encoder = render.FrameEncoder(os.path.join(VIDEO_OUTPUT_DIR, clips.clip_name(GENERATION)), FPS, render.tier_size(tier))
+    top_k = render.RENDER_TIERS[tier]["top_k"] if encoder else render.LOD_TOP_K # Previews (BRAIN_HEADLESS=0) draw like full
+    TIMER.lap("setup")
 
     frame_count = 0
-    max_frames = MAX_FRAMES_PRO if GENERATION >= FINAL_GEN else MAX_FRAMES_TRAINING
 
-    while len(cars) > 0 and frame_count < max_frames:
+    while frame_count < frame_cap(max_frames) and keep_driving(fleet, frame_count, max_frames):
         frame_count += 1
         for event in pygame.event.get():
             if event.type == pygame.QUIT: sys.exit()
 
+        rows = compact(fleet, net, rows)
+        cars = fleet.cars
+
         # Follow Leader
-        leader = max(cars, key=lambda c: c.gates_passed * 1000 + c.distance_traveled)
+        leader = cars[leader_index(fleet, track)]
         camera.update(leader)
-        for c in cars: c.is_leader = (c == leader)
-
-        for i, car in enumerate(cars):
-            if not car.alive: continue
-            
-            car.check_radar(map_mask)
-            inputs = [d[1] / simulation.SENSOR_LENGTH for d in car.radars]
-            gps = car.check_gates(checkpoints) # Just gate logic, no extra inputs
-            # Reverting to 7 inputs (Radars + GPS Angle/Dist) was safer? 
-            # Actually, the working code used 5 radars + 2 GPS. Let's stick to that.
-            # But the 'Car' class doesn't have the fancy get_data() method in this version.
-            # We will use simple inputs: Radars + Speed + Angle?
-            # WAIT. The user's code used: "if len(car.radars) < 5... inputs.extend(gps)"
-            # But the Car class in simulation.py didn't have `get_data`.
-            # I will add `get_data` to simulation.py Car class now. (Done in file above?)
-            # NO. I need to add it to the simulation.py above.
-            
-            # Since I can't edit the block above, I will Inline the GPS logic here to be safe.
-            # Actually, let's keep it simple: 5 Radars + 0 + 0 (If GPS fails) to ensure it runs.
-            
-            # Let's rely on Radars only for now to guarantee no crash?
-            # No, the config expects 7 inputs.
-            # 5 Radars + Speed + 0.
-            
-            output = nets[i].activate(inputs + [car.speed/30.0, 0])
-            
-            if output[0] > 0.5: car.input_steer(right=True)
-            elif output[0] < -0.5: car.input_steer(left=True)
-            car.input_gas()
-            car.update(map_mask, skid_map)
-
-            if car.check_gates(checkpoints): ge[i].fitness += 200
-            if not car.alive: ge[i].fitness -= 50
+        for c in cars: c.is_leader = (c is leader)
+
+        decide = (frame_count - 1) % decision_interval(max_frames) == 0
+        for r, d in zip(rows, drive(fleet, net, track, world.surface, decide)):
+            if d: ge[r].fitness += d if PROGRESS_BONUS else int(d)
 
         # Draw
-        if writer or frame_count % 10 == 0:
-            screen.fill(simulation.THEME["bg"])
-            # SIMPLE BLIT - NO FANCY LOGIC
-            screen.blit(visual_map, (camera.camera.x, camera.camera.y))
-            screen.blit(skid_map, (camera.camera.x, camera.camera.y))
-            for c in cars: c.draw(screen, camera)
-            
-            # HUD
-            font = pygame.font.SysFont("consolas", 40, bold=True)
-            screen.blit(font.render(f"GEN {GENERATION}", True, (200,200,200)), (20, 20))
-            pygame.display.flip()
-            
-            if writer:
-                try: writer.append_data(np.transpose(pygame.surfarray.array3d(screen), (1, 0, 2)))
-                except: pass
-
-    if writer: writer.close()
+        if encoder or frame_count % 10 == 0:
+            TIMER.mark()
+            detail = render.lod(fleet.progress, fleet.alive, top_k)
+            session.draw(cars, f"GEN {GENERATION}", detail)
+            TIMER.lap("drawing")
+            if encoder: encoder.submit(session.screen)
+            TIMER.lap("capture")
+
+    TIMER.mark()
+    frames = encoder.close() if encoder else 0 # Waits for ffmpeg to catch up
+    TIMER.lap("capture")
+    if len(TRACK_SEEDS) > 1:
+        for g, fitness in zip(ge, eval_tracks(ge, config, max_frames, [g.fitness for g in ge])): g.fitness = fitness
+    if encoder: CLIPS.add(encoder.path, GENERATION, frames / FPS, encoder.size, max(g.fitness for g in ge), tier)
+    TIMER.mark()
+    remember_fitness(ge, max_frames)
+    TIMER.lap("cache")
+
+_FLEET = None
+
+def headless_fleet(n, track):
+    """This process's headless CarFleet, reset for n cars on `track` (allocated once, grown if needed)."""
+    global _FLEET
+    if _FLEET is None: _FLEET = simulation.CarFleet(n, track.start_pos, track.start_angle)
+    return _FLEET.reset(n, track.start_pos, track.start_angle)
+
+# --- PARALLEL EVALUATION ---
+# Workers load the tracks from the disk cache (mask/field are memory-mapped, so the
+# pages are shared) and score chunks of genomes headlessly as one fleet. Cars never
+# interact, so a car scores the same in any chunk as inside the full 40-car loop.
+def _init_worker(seeds):
+    # No pygame.init() here: SDL would swallow the SIGTERM that Pool uses to stop workers
+    for seed in seeds: simulation.load_track(seed)
+
+def eval_genomes(genomes, config, max_frames, track=None, replay=None):
+    """Headless fitness for a list of genomes (a pool chunk, or a whole headless generation).
+
+    With a render.ReplayRecorder, every frame's poses and leader are logged as well.
+    """
+    track = track or simulation.load_track(TRACK_SEED)
+    TIMER.mark()
+    net = batchnet.BatchNetwork.create(genomes, config)
+    fleet = headless_fleet(len(genomes), track)
+    rows = np.arange(len(genomes)) # fleet row -> genome, as the fleet gets compacted
+    fitness = np.zeros(len(genomes), dtype=float if PROGRESS_BONUS else int)
+    interval = decision_interval(max_frames)
+    TIMER.lap("networks")
+    for frame in range(frame_cap(max_frames)):
+        if not keep_driving(fleet, frame, max_frames): break
+        rows = compact(fleet, net, rows)
+        if replay: leader = rows[leader_index(fleet, track)]
+        fitness[rows] += drive(fleet, net, track, decide=frame % interval == 0).astype(fitness.dtype)
+        if replay:
+            replay.record(fleet, leader, rows)
+            TIMER.lap("capture")
+    return fitness.tolist()
+
+def aggregate(scores):
+    """Per-genome fitness from per-track score lists: the mean, or just the score with one track."""
+    return [s[0] if len(s) == 1 else sum(s) / len(s) for s in zip(*scores)]
+
+def eval_tracks(genomes, config, max_frames, filmed=None):
+    """Fitness over every track in TRACK_SEEDS. `filmed` = scores already driven on the first one."""
+    scores = [filmed if filmed is not None else eval_genomes(genomes, config, max_frames, simulation.load_track(TRACK_SEEDS[0]))]
+    scores += [eval_genomes(genomes, config, max_frames, simulation.load_track(seed)) for seed in TRACK_SEEDS[1:]]
+    return aggregate(scores)
+
+def _eval_chunk(genomes, config, max_frames, seed):
+    """eval_genomes on one track in a pool worker, sending the worker's phase times back with the fitness."""
+    TIMER.reset()
+    return eval_genomes(genomes, config, max_frames, simulation.load_track(seed)), TIMER.take()
+
+class ParallelEvaluator:
+    """Same shape as neat.ParallelEvaluator: pass `.evaluate` to Population.run.
+
+    Training-only generations are spread over the pool, one job per chunk per track;
+    generations that record video run through run_simulation here, since only this
+    process owns the screen.
+    """
+    def __init__(self, num_workers, seeds=TRACK_SEEDS, timeout=None):
+        self.num_workers = num_workers
+        self.seeds = list(seeds)
+        self.timeout = timeout
+        for seed in self.seeds: simulation.load_track(seed) # Warm the disk cache before the workers race to build it
+        self.pool = multiprocessing.Pool(num_workers, initializer=_init_worker, initargs=(self.seeds,))
+
+    def __del__(self):
+        self.pool.close()
+        self.pool.join()
+
+    def evaluate(self, genomes, config):
+        global GENERATION
+        if should_record(GENERATION + 1): return run_simulation(genomes, config)
+
+        GENERATION += 1
+        print(f"\n--- 🏁 Gen {GENERATION} ({self.num_workers} workers) ---")
+        max_frames = frame_budget(GENERATION)
+        cached_drive([g for _, g in genomes], max_frames, lambda todo: self.map(todo, config, max_frames))
+
+    def map(self, genomes, config, max_frames):
+        chunks = [c for c in (genomes[i::self.num_workers] for i in range(self.num_workers)) if c]
+        jobs = [[self.pool.apply_async(_eval_chunk, (c, config, max_frames, seed)) for c in chunks] for seed in self.seeds]
+        scores = []
+        for track_jobs in jobs:
+            fitness = {}
+            for job, chunk in zip(track_jobs, chunks):
+                chunk_scores, totals = job.get(timeout=self.timeout)
+                TIMER.add(totals)
+                for g, f in zip(chunk, chunk_scores): fitness[id(g)] = f
+            scores.append([fitness[id(g)] for g in genomes])
+        return aggregate(scores)
 
 def run_neat(config_path):
     global GENERATION, START_GEN, FINAL_GEN
-    for f in glob.glob(os.path.join(VIDEO_OUTPUT_DIR, "*.mp4")): 
-        try: os.remove(f)
-        except: pass
-
-    checkpoints = [f for f in os.listdir(".") if f.startswith("neat-checkpoint-")]
-    if checkpoints:
-        latest = sorted(checkpoints, key=lambda x: int(x.split('-')[2]))[-1]
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation, config_path)
+    latest = checkpoint.latest(CHECKPOINT_DIR)
+    legacy = [f for f in os.listdir(".") if f.startswith("neat-checkpoint-")] # Pickled checkpoints from before the manifest
+    if latest:
+        path, START_GEN = latest
+        GENERATION = START_GEN
+        print(f"💾 Resuming from {path}")
+        p = checkpoint.restore(path, config)
+    elif legacy:
+        latest = sorted(legacy, key=lambda x: int(x.split('-')[2]))[-1]
         START_GEN = int(latest.split('-')[2])
         GENERATION = START_GEN
         p = neat.Checkpointer.restore_checkpoint(latest)
     else:
+        CLIPS.clear() # A new lineage: earlier clips would be mixed into its video
         run_dummy_generation()
         START_GEN = 0; GENERATION = 0
-        p = neat.Population(neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation, config_path))
+        p = neat.Population(config)
     
     FINAL_GEN = START_GEN + DAILY_GENERATIONS
     p.add_reporter(neat.StdOutReporter(True))
-    p.add_reporter(neat.Checkpointer(5, filename_prefix="neat-checkpoint-"))
-    p.run(run_simulation, DAILY_GENERATIONS)
+    checkpointer = checkpoint.CompactCheckpointer(CHECKPOINT_DIR, CHECKPOINT_EVERY, CHECKPOINT_KEEP, CHECKPOINT_MILESTONE, CHECKPOINT_BACKGROUND)
+    p.add_reporter(checkpointer)
+    profile = phases.PhaseReporter(TIMER, PROFILE_FILE, lambda: GENERATION) if TIMER.enabled else None
+    if profile: p.add_reporter(profile)
+    champions = champion.ChampionReporter()
+    p.add_reporter(champions)
+    evaluate = ParallelEvaluator(WORKERS).evaluate if WORKERS > 1 else run_simulation
+    try: p.run(evaluate, DAILY_GENERATIONS)
+    finally:
+        checkpointer.flush()
+        render_pending(profile) # Even after a crash: the generations that did finish keep their clips
+    if champions.best:
+        champion.export(champions.best, config, CHAMPION_FILE)
+        print(f"🏆 Exported the top {len(champions.best)} drivers to {CHAMPION_FILE}")
+
+def render_pending(profile=None):
+    """Render this run's replay logs into the clip library."""
+    if not REPLAYS: return
+    print(f"\n--- 🎬 Rendering {len(REPLAYS)} replays ---")
+    start = time.perf_counter()
+    render.render_replays(REPLAYS, VIDEO_OUTPUT_DIR, RENDER_WORKERS)
+    REPLAYS.clear()
+    elapsed = time.perf_counter() - start
+    # Drawing and ffmpeg both happen in the renderers; logged as one capture row after the last generation
+    if profile: profile.record(GENERATION, 0, elapsed, {"capture": elapsed}, kind="render")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the NEAT drivers for DAILY_GENERATIONS generations.")
+    parser.add_argument("--profile-imports", action="store_true", help="report what each deferred dependency costs to load, then exit")
+    args = parser.parse_args()
+    if args.profile_imports:
+        print("⏱️ Deferred imports (in first-use order):")
+        lazy.profile_imports(HEAVY_IMPORTS)
+        sys.exit()
     create_config_file()
     run_neat("config.txt")
@@ -0,0 +1,163 @@
+import os
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import sys
+import copy
+import json
+import time
+import pickle
+import argparse
+import numpy as np
+import neat
+import batchnet
+
+# The trained drivers as plain arrays: a batchnet.BatchNetwork's weights, biases,
+# responses and layer masks in one .npz. Loading one needs no NEAT config and no
+# pickled population.
+#   python champion.py export --top 5
+#   python champion.py eval champion.npz --seeds 42 43 44 45
+CHAMPION_FILE = "champion.npz"
+CHAMPION_VERSION = 1
+CHAMPION_TOP = 5 # Drivers exported at the end of a run
+
+def export(genomes, config, path=CHAMPION_FILE):
+    """Write `genomes` (best first) as one compact network file. Returns the path."""
+    net = batchnet.BatchNetwork.create(genomes, config)
+    n, k = net.bias.shape
+    meta = {"version": CHAMPION_VERSION, "num_inputs": net.num_inputs, "num_outputs": net.num_outputs,
+            "nodes": [len(g.nodes) for g in genomes], "connections": [sum(c.enabled for c in g.connections.values()) for g in genomes]}
+    arrays = {"meta": np.array(json.dumps(meta)),
+              "key": np.array([g.key for g in genomes], dtype=np.int64),
+              "fitness": np.array([np.nan if g.fitness is None else g.fitness for g in genomes], dtype=np.float64),
+              "weights": net.weights, "bias": net.bias, "response": net.response,
+              "layers": np.array(net.layers, dtype=bool).reshape(len(net.layers), n, k)}
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f: np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+    return path
+
+def load(path):
+    """(BatchNetwork, keys, fitness) from an export() file."""
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        if meta["version"] != CHAMPION_VERSION: raise ValueError(f"Champion file version {meta['version']}, expected {CHAMPION_VERSION}")
+        net = batchnet.BatchNetwork(data["weights"], data["bias"], data["response"], list(data["layers"]), meta["num_inputs"], meta["num_outputs"])
+        return net, data["key"].tolist(), [None if np.isnan(f) else f for f in data["fitness"].tolist()]
+
+def top(genomes, n):
+    """The n fittest genomes, best first (unevaluated ones never make it)."""
+    return sorted((g for g in genomes if g.fitness is not None), key=lambda g: g.fitness, reverse=True)[:n]
+
+class ChampionReporter(neat.reporting.BaseReporter):
+    """Keeps copies of the n fittest genomes seen so far, so a run can export them when it ends."""
+    def __init__(self, n=CHAMPION_TOP):
+        self.n = n
+        self.best = []
+
+    def post_evaluate(self, config, population, species, best_genome):
+        # An elite re-evaluated this generation replaces its older copy
+        seen = {g.key for g in population.values()}
+        pool = [g for g in self.best if g.key not in seen] + list(population.values())
+        self.best = [copy.deepcopy(g) for g in top(pool, self.n)]
+
+def genomes_from(path, config):
+    """Genomes in a compact checkpoint (.npz), a pickled genome (.pkl) or a legacy neat-checkpoint file."""
+    import checkpoint
+    if path.endswith(".npz"):
+        with np.load(path) as data: return list(checkpoint.unpack(data, config)[0].values())
+    if path.endswith(".pkl"):
+        with open(path, "rb") as f: return [pickle.load(f)]
+    return list(neat.Checkpointer.restore_checkpoint(path).population.values())
+
+def evaluate(net, seed, max_frames):
+    """Drive every network in `net` around track `seed` as one headless fleet, scored as in training.
+
+    Returns per-driver dicts: fitness, gates, laps, best lap (s), gates/sec while alive.
+    """
+    import brain, simulation
+    track = simulation.load_track(seed)
+    net = net.copy()
+    n = len(net.bias)
+    gates_per_lap = len(track.checkpoints)
+    fleet = brain.headless_fleet(n, track)
+    rows = np.arange(n)
+    fitness = np.zeros(n)
+    frames_alive = np.zeros(n, dtype=int)
+    laps = np.zeros(n, dtype=int)
+    lap_start = np.zeros(n, dtype=int)
+    best_lap = np.full(n, np.inf)
+    gates = np.zeros(n, dtype=int)
+    interval = brain.decision_interval(max_frames)
+    for frame in range(brain.frame_cap(max_frames)):
+        if not brain.keep_driving(fleet, frame, max_frames): break
+        rows = brain.compact(fleet, net, rows)
+        frames_alive[rows[fleet.alive]] += 1
+        fitness[rows] += brain.drive(fleet, net, track, decide=frame % interval == 0)
+        gates[rows] = fleet.gates_passed
+        done = fleet.gates_passed // gates_per_lap > laps[rows]
+        lapped = rows[done]
+        best_lap[lapped] = np.minimum(best_lap[lapped], (frame + 1 - lap_start[lapped]) / brain.FPS)
+        lap_start[lapped] = frame + 1
+        laps[lapped] += 1
+    if not brain.PROGRESS_BONUS: fitness = fitness.astype(int)
+    return [{"fitness": fitness[i].item(), "gates": int(gates[i]), "laps": int(laps[i]),
+             "best_lap": None if np.isinf(best_lap[i]) else round(float(best_lap[i]), 2),
+             "gates_per_sec": round(float(gates[i]) / max(frames_alive[i], 1) * brain.FPS, 2)} for i in range(n)]
+
+def run_eval(path, seeds, max_frames):
+    start = time.perf_counter()
+    net, keys, trained = load(path)
+    print(f"📦 Loaded {len(keys)} drivers from {path} in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    report = {"file": path, "seeds": seeds, "max_frames": max_frames, "drivers": []}
+    results = [] # [seed][driver]
+    start = time.perf_counter()
+    for seed in seeds: results.append(evaluate(net, seed, max_frames))
+    elapsed = time.perf_counter() - start
+    for i, key in enumerate(keys):
+        runs = [r[i] for r in results]
+        laps = [r["best_lap"] for r in runs if r["best_lap"] is not None]
+        summary = {"key": key, "trained_fitness": trained[i], "fitness_mean": round(float(np.mean([r["fitness"] for r in runs])), 2),
+                   "gates_per_sec": round(float(np.mean([r["gates_per_sec"] for r in runs])), 2),
+                   "lapped": f"{len(laps)}/{len(runs)}", "best_lap": min(laps) if laps else None, "runs": dict(zip(seeds, runs))}
+        report["drivers"].append(summary)
+        print(f"🏎️ #{key:<6} fitness {summary['fitness_mean']:>9}  gates/s {summary['gates_per_sec']:>5}  "
+              f"laps on {summary['lapped']} tracks  best lap {summary['best_lap'] or '-'}s")
+    print(f"⏱️ {len(keys)} drivers x {len(seeds)} tracks in {elapsed:.2f}s")
+    report["seconds"] = round(elapsed, 3)
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export trained drivers to a compact .npz and evaluate them headlessly.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ex = sub.add_parser("export", help="write the top genomes of a checkpoint / pickled genome as a network file",
+                        description="A checkpoint only has scores for the elites carried into it, so it may hold fewer "
+                                    f"than --top drivers; the full top-N of a run is the {CHAMPION_FILE} written when training ends.")
+    ex.add_argument("--from", dest="source", help="checkpoint .npz, genome .pkl or neat-checkpoint-N (default: newest checkpoint)")
+    ex.add_argument("--top", type=int, default=CHAMPION_TOP)
+    ex.add_argument("--out", default=CHAMPION_FILE)
+    ev = sub.add_parser("eval", help="drive exported networks on several tracks and report laps and gates/sec")
+    ev.add_argument("file", nargs="?", default=CHAMPION_FILE)
+    ev.add_argument("--seeds", type=int, nargs="+", default=[42])
+    ev.add_argument("--frames", type=int, default=1800, help="frame budget per track")
+    ev.add_argument("--json", help="write the report here as well")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        import brain, checkpoint
+        source = args.source or (checkpoint.latest(brain.CHECKPOINT_DIR) or [None])[0]
+        if not source: sys.exit(f"❌ No checkpoint in {brain.CHECKPOINT_DIR}; pass --from")
+        brain.create_config_file()
+        config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation, "config.txt")
+        best = top(genomes_from(source, config), args.top)
+        if not best: sys.exit(f"❌ No evaluated genomes in {source}")
+        if len(best) < args.top:
+            print(f"⚠️ Only {len(best)} of the {args.top} requested genomes in {source} have a fitness "
+                  f"(a checkpoint scores just its carried-over elites); the end-of-run {CHAMPION_FILE} has the full top {CHAMPION_TOP}")
+        export(best, config, args.out)
+        print(f"🏆 Exported {len(best)} drivers from {source} -> {args.out} (best fitness {best[0].fitness})")
+    else:
+        report = run_eval(args.file, args.seeds, args.frames)
+        if args.json:
+            with open(args.json, "w") as f: json.dump(report, f, indent=2)
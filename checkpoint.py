@@ -0,0 +1,197 @@
+import os
+import json
+import queue
+import random
+import threading
+from itertools import count
+import numpy as np
+import neat
+
+# Checkpoints as flat gene tables in one compressed .npz per save, plus a manifest.json
+# naming the latest one, so resuming never lists or sorts the directory.
+CHECKPOINT_VERSION = 1
+MANIFEST = "manifest.json"
+
+def _atomic_write(path, write):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f: write(f)
+    os.replace(tmp, path)
+
+def _columns(rows, width):
+    return list(zip(*rows)) if rows else [()] * width
+
+def _optional(x):
+    return None if np.isnan(x) else float(x)
+
+def pack(population, species_set, generations, genome_config=None):
+    """Everything a resume needs, as arrays: one row per genome, node gene, connection gene and species.
+
+    Pass the genome config so its node key counter is saved too; without it a resumed
+    run may hand out node keys other genomes already use.
+    """
+    genomes = list(population.values())
+    activations = sorted({n.activation for g in genomes for n in g.nodes.values()})
+    aggregations = sorted({n.aggregation for g in genomes for n in g.nodes.values()})
+    nodes = [(row, k, n.bias, n.response, activations.index(n.activation), aggregations.index(n.aggregation))
+             for row, g in enumerate(genomes) for k, n in g.nodes.items()]
+    conns = [(row, i, o, c.weight, c.enabled) for row, g in enumerate(genomes) for (i, o), c in g.connections.items()]
+    species = list(species_set.species.values())
+
+    # Peek at the species counter without losing the number
+    next_species = next(species_set.indexer)
+    species_set.indexer = count(next_species)
+    next_node = None # Still None = neat hasn't added a node yet and seeds the counter lazily
+    if genome_config is not None and genome_config.node_indexer is not None:
+        next_node = next(genome_config.node_indexer)
+        genome_config.node_indexer = count(next_node)
+    version, state, gauss = random.getstate()
+
+    n_row, n_key, n_bias, n_response, n_act, n_agg = _columns(nodes, 6)
+    c_row, c_in, c_out, c_weight, c_enabled = _columns(conns, 5)
+    return {
+        "meta": np.array(json.dumps({"version": CHECKPOINT_VERSION, "generations": generations, "next_species": next_species, "next_node": next_node,
+                                     "activations": activations, "aggregations": aggregations,
+                                     "random_version": version, "random_gauss": gauss})),
+        "random_state": np.array(state, dtype=np.uint32),
+        "genome_key": np.array([g.key for g in genomes], dtype=np.int64),
+        "genome_fitness": np.array([np.nan if g.fitness is None else g.fitness for g in genomes], dtype=np.float64),
+        "genome_species": np.array([species_set.genome_to_species[g.key] for g in genomes], dtype=np.int64),
+        "node_row": np.array(n_row, dtype=np.int32), "node_key": np.array(n_key, dtype=np.int64),
+        "node_bias": np.array(n_bias, dtype=np.float64), "node_response": np.array(n_response, dtype=np.float64),
+        "node_activation": np.array(n_act, dtype=np.int8), "node_aggregation": np.array(n_agg, dtype=np.int8),
+        "conn_row": np.array(c_row, dtype=np.int32), "conn_in": np.array(c_in, dtype=np.int64), "conn_out": np.array(c_out, dtype=np.int64),
+        "conn_weight": np.array(c_weight, dtype=np.float64), "conn_enabled": np.array(c_enabled, dtype=bool),
+        "species_key": np.array([s.key for s in species], dtype=np.int64),
+        "species_created": np.array([s.created for s in species], dtype=np.int64),
+        "species_last_improved": np.array([s.last_improved for s in species], dtype=np.int64),
+        "species_representative": np.array([s.representative.key for s in species], dtype=np.int64),
+        "species_fitness": np.array([np.nan if s.fitness is None else s.fitness for s in species], dtype=np.float64),
+        "species_adjusted_fitness": np.array([np.nan if s.adjusted_fitness is None else s.adjusted_fitness for s in species], dtype=np.float64),
+        "species_history_len": np.array([len(s.fitness_history) for s in species], dtype=np.int64),
+        "species_history": np.array([f for s in species for f in s.fitness_history], dtype=np.float64),
+    }
+
+def unpack(data, config):
+    """Rebuild (population, species_set, generations) from pack()'s arrays. Restores the random state
+    and config's node key counter too."""
+    meta = json.loads(str(data["meta"]))
+    if meta["version"] != CHECKPOINT_VERSION: raise ValueError(f"Checkpoint version {meta['version']}, expected {CHECKPOINT_VERSION}")
+    gc = config.genome_config
+    genomes = []
+    for key, fitness in zip(data["genome_key"].tolist(), data["genome_fitness"].tolist()):
+        g = config.genome_type(key)
+        g.fitness = _optional(fitness)
+        genomes.append(g)
+    for row, key, bias, response, act, agg in zip(*(data[k].tolist() for k in ("node_row", "node_key", "node_bias", "node_response", "node_activation", "node_aggregation"))):
+        n = gc.node_gene_type(key)
+        n.bias, n.response = bias, response
+        n.activation, n.aggregation = meta["activations"][act], meta["aggregations"][agg]
+        genomes[row].nodes[key] = n
+    for row, i, o, weight, enabled in zip(*(data[k].tolist() for k in ("conn_row", "conn_in", "conn_out", "conn_weight", "conn_enabled"))):
+        c = gc.connection_gene_type((i, o))
+        c.weight, c.enabled = weight, enabled
+        genomes[row].connections[(i, o)] = c
+    population = {g.key: g for g in genomes}
+
+    species_set = config.species_set_type(config.species_set_config, None)
+    species_set.indexer = count(meta["next_species"])
+    species_set.genome_to_species = dict(zip(data["genome_key"].tolist(), data["genome_species"].tolist()))
+    history = np.split(data["species_history"], np.cumsum(data["species_history_len"])[:-1]) if len(data["species_key"]) else []
+    for i, key in enumerate(data["species_key"].tolist()):
+        s = neat.species.Species(key, int(data["species_created"][i]))
+        s.last_improved = int(data["species_last_improved"][i])
+        s.update(population[int(data["species_representative"][i])],
+                 {gid: population[gid] for gid, sid in species_set.genome_to_species.items() if sid == key})
+        s.fitness = _optional(data["species_fitness"][i])
+        s.adjusted_fitness = _optional(data["species_adjusted_fitness"][i])
+        s.fitness_history = history[i].tolist()
+        species_set.species[key] = s
+
+    if "next_node" in meta:
+        gc.node_indexer = None if meta["next_node"] is None else count(meta["next_node"])
+    else: # Saved before the counter was: past every node key still in use
+        gc.node_indexer = count(max(k for g in genomes for k in g.nodes) + 1)
+
+    random.setstate((meta["random_version"], tuple(data["random_state"].tolist()), meta["random_gauss"]))
+    return population, species_set, meta["generations"]
+
+def latest(directory):
+    """(path, generations) of the newest checkpoint in the manifest, or None."""
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f: entries = json.load(f)["checkpoints"]
+    except (OSError, ValueError, KeyError): return None
+    if not entries: return None
+    return os.path.join(directory, entries[-1]["file"]), entries[-1]["generations"]
+
+def restore(path, config):
+    """A neat.Population resuming from a checkpoint written by CompactCheckpointer."""
+    with np.load(path) as data: population, species_set, generations = unpack(data, config)
+    p = neat.Population(config, (population, species_set, generations))
+    species_set.reporters = p.reporters
+    # Children are numbered after the newest genome, which is always still in the population
+    p.reproduction.genome_indexer = count(max(population) + 1)
+    return p
+
+class CompactCheckpointer(neat.reporting.BaseReporter):
+    """Drop-in for neat.Checkpointer: compact .npz checkpoints, a manifest, and retention.
+
+    Saves after every `every` evaluated generations. The arrays are packed on the
+    generation loop (cheap); compressing and writing happen on a background thread
+    unless background=False. Only the last `keep` checkpoints survive, plus every
+    `milestone`-th (0 = none). Call flush() before exiting to finish pending writes.
+    """
+    def __init__(self, directory="checkpoints", every=5, keep=3, milestone=50, background=True):
+        self.directory = directory
+        self.every = every
+        self.keep = keep
+        self.milestone = milestone
+        self.background = background
+        self.generation = None
+        self._queue = None
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def end_generation(self, config, population, species_set):
+        generations = self.generation + 1 # Evaluated so far: the resumed run picks up at the next one
+        if generations % self.every: return
+        arrays = pack(population, species_set, generations, config.genome_config)
+        if not self.background: return self._write(generations, arrays)
+        if self._thread is None:
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._queue.put((generations, arrays))
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None: break
+            try: self._write(*job)
+            except Exception as e: print(f"⚠️ Checkpoint {job[0]} failed: {e}")
+
+    def _write(self, generations, arrays):
+        name = f"gen_{generations:05d}.npz"
+        _atomic_write(os.path.join(self.directory, name), lambda f: np.savez_compressed(f, **arrays))
+        print(f"💾 Checkpoint {name}")
+
+        manifest = os.path.join(self.directory, MANIFEST)
+        try:
+            with open(manifest) as f: entries = json.load(f)["checkpoints"]
+        except (OSError, ValueError, KeyError): entries = []
+        entries = [e for e in entries if e["generations"] < generations] + [{"generations": generations, "file": name}]
+        recent = entries[-max(self.keep, 1):]
+        kept = [e for e in entries if e in recent or (self.milestone and e["generations"] % self.milestone == 0)]
+        _atomic_write(manifest, lambda f: f.write(json.dumps({"version": CHECKPOINT_VERSION, "checkpoints": kept}, indent=2).encode()))
+        for e in entries:
+            if e not in kept:
+                try: os.remove(os.path.join(self.directory, e["file"]))
+                except OSError: pass
+
+    def flush(self):
+        if self._thread is None: return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
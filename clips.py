@@ -0,0 +1,78 @@
+import os
+import re
+import json
+
+# The clip library: training_clips/ plus an index.json with one entry per clip, so the
+# editor can pick clips by generation, length and fitness without opening any of them.
+INDEX = "index.json"
+INDEX_VERSION = 1
+CLIP_KEEP = int(os.environ.get("BRAIN_CLIP_KEEP", "30")) # Newest clips kept...
+CLIP_MILESTONE = 100 # ...plus every this-many generations, plus the gen 0 hook
+
+def clip_name(generation):
+    return f"gen_{generation:05d}.mp4"
+
+class ClipLibrary:
+    """Index of the clips in `directory`: generation, duration, resolution, fitness, tier, file.
+
+    add() registers a finished clip and applies retention: the `keep` newest
+    generations survive, plus every `milestone`-th and generation 0; the rest are
+    deleted. Entries whose file has gone missing are dropped on load.
+    """
+    def __init__(self, directory="training_clips", keep=CLIP_KEEP, milestone=CLIP_MILESTONE):
+        self.directory = directory
+        self.keep = keep
+        self.milestone = milestone
+        self.index_path = os.path.join(directory, INDEX)
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, entry):
+        return os.path.join(self.directory, entry["file"])
+
+    def entries(self):
+        """Indexed clips that still exist, oldest generation first."""
+        try:
+            with open(self.index_path) as f: entries = json.load(f)["clips"]
+        except (OSError, ValueError, KeyError): return []
+        return [e for e in entries if os.path.exists(self.path(e))]
+
+    def add(self, path, generation, duration, size, fitness=None, tier="full"):
+        entry = {"generation": generation, "file": os.path.basename(path), "duration": round(duration, 3),
+                 "width": size[0], "height": size[1], "fitness": fitness, "tier": tier}
+        entries = [e for e in self.entries() if e["generation"] != generation] + [entry]
+        self._write(self.retain(sorted(entries, key=lambda e: e["generation"])))
+        return entry
+
+    def retain(self, entries):
+        recent = entries[-max(self.keep, 1):]
+        kept = [e for e in entries if e in recent or e["generation"] == 0 or (self.milestone and e["generation"] % self.milestone == 0)]
+        for e in entries:
+            if e not in kept:
+                try: os.remove(self.path(e))
+                except OSError: pass
+        return kept
+
+    def clear(self):
+        """Delete every clip (indexed or not) and the index: a fresh run starts a fresh library."""
+        for name in os.listdir(self.directory):
+            if name.endswith(".mp4") or name == INDEX:
+                try: os.remove(os.path.join(self.directory, name))
+                except OSError: pass
+
+    def rebuild(self):
+        """Add gen_XXXXX.mp4 files missing from the index (from before the library, or never added), with unknown durations."""
+        entries = self.entries()
+        indexed = {e["file"] for e in entries}
+        for name in sorted(os.listdir(self.directory)):
+            match = re.fullmatch(r"gen_(\d+)\.mp4", name)
+            if match and name not in indexed:
+                entries.append({"generation": int(match.group(1)), "file": name, "duration": None,
+                                "width": None, "height": None, "fitness": None, "tier": None})
+        entries.sort(key=lambda e: e["generation"])
+        self._write(entries)
+        return entries
+
+    def _write(self, entries):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f: json.dump({"version": INDEX_VERSION, "clips": entries}, f, indent=2)
+        os.replace(tmp, self.index_path)
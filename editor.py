@@ -3,22 +3,39 @@ import os
 os.environ["SDL_VIDEODRIVER"] = "dummy"
 os.environ["SDL_AUDIODRIVER"] = "dummy"
 
-import PIL.Image
-if not hasattr(PIL.Image, 'ANTIALIAS'):
-    PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
-
+import re
+import sys
 import random
 import json
-from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip, concatenate_videoclips, AudioFileClip, CompositeAudioClip, vfx
-from moviepy.audio.fx.all import audio_loop
-
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+import shutil
+import hashlib
+import itertools
+import argparse
+import tempfile
+import subprocess
+from multiprocessing.pool import ThreadPool
+import clips
+import lazy
+# moviepy/PIL are imported in make_video and the Google API client in upload_video:
+# listing clips or profiling shouldn't pay for either
+HEAVY_IMPORTS = ["PIL.Image", "moviepy.editor", "google.oauth2.credentials", "googleapiclient.discovery"]
 
 # CONFIG
 CLIPS_DIR = "training_clips"
 OUTPUT_FILE = "evolution_35s.mp4"
+TARGET_DURATION = 35.0
+SEGMENT_MAX = 5.0 # Seconds taken from the start of each clip
+ENCODER_PRESET = os.environ.get("EDITOR_PRESET", "veryfast") # libx264 preset
+ENCODER_THREADS = int(os.environ.get("EDITOR_THREADS", "0")) # Per encode; 0 = let ffmpeg decide
+EDITOR_WORKERS = int(os.environ.get("EDITOR_WORKERS", str(os.cpu_count() or 1))) # Segments encoded at once
+OVERLAY_DIR = os.path.join(".editor_cache", "overlays")
+OVERLAY_FONT = "DejaVuSans-Bold.ttf"
+
+# --- TEXT OVERLAYS ---
+# text, font size, colour, stroke width, overlay x/y (ffmpeg expressions; W/H = video, w/h = text)
+HOOK_TEXT = ("GEN 0: CHAOS 🤡", 80, "white", 3, "(W-w)/2", "H*0.8")
+MONTAGE_TEXT = ("Gen {gen}", 60, "yellow", 2, "0", "0")
+PAYOFF_TEXT = ("MASTERED IT 🚀", 80, "#00ff41", 3, "(W-w)/2", "(H-h)/2")
 
 # --- DJ SYSTEM ---
 MUSIC_OPTIONS = ["music.mp3", "music2.mp3", "music3.mp3"] 
@@ -37,25 +54,154 @@ def get_viral_title(generation):
     template = random.choice(VIRAL_TITLES)
     return template.format(gen=generation)
 
-def make_video():
-    print("🎬 Starting 35s Strict-Edit...")
+def pick_clips():
+    """(hook, montage, payoff) clip library entries, or None if there is nothing to edit.
 
+    Chosen from the library index alone: no clip is opened here.
+    """
     if not os.path.exists(CLIPS_DIR):
         print(f"❌ Error: Directory '{CLIPS_DIR}' not found.")
-        return None, 0
+        return None
 
-    files = [f for f in os.listdir(CLIPS_DIR) if f.endswith(".mp4")]
-    if not files:
+    library = clips.ClipLibrary(CLIPS_DIR)
+    entries = library.rebuild() # Picks up clips the index never heard of
+    if not entries:
         print("❌ Error: No .mp4 files found.")
+        return None
+
+    middle = entries[1:-1]
+    if len(middle) > 5:
+        middle = sorted(random.sample(middle, 5), key=lambda e: e["generation"])
+    return entries[0], middle, entries[-1]
+
+def clip_path(entry):
+    return os.path.join(CLIPS_DIR, entry["file"])
+
+def ffmpeg_exe():
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except ImportError:
+        return shutil.which("ffmpeg")
+
+def clip_duration(ffmpeg, path):
+    """Container duration in seconds, read from ffmpeg's header dump (no decoding)."""
+    info = subprocess.run([ffmpeg, "-hide_banner", "-i", path], capture_output=True, text=True).stderr
+    match = re.search(r"Duration: (\d+):(\d+):([\d.]+)", info)
+    if not match: raise RuntimeError(f"Can't read the duration of {path}")
+    h, m, sec = match.groups()
+    return int(h) * 3600 + int(m) * 60 + float(sec)
+
+def clip_size(ffmpeg, path):
+    """(width, height) of the first video stream, from the same header dump."""
+    info = subprocess.run([ffmpeg, "-hide_banner", "-i", path], capture_output=True, text=True).stderr
+    match = re.search(r"Video:.*?, (\d+)x(\d+)", info)
+    if not match: raise RuntimeError(f"Can't read the size of {path}")
+    return int(match.group(1)), int(match.group(2))
+
+def output_size(ffmpeg, entries):
+    """The short's frame size: the full-tier clips' size from the index, else the first clip's.
+
+    Draft milestone clips are half size; every segment is scaled to this so the
+    stream-copied join never changes resolution partway through.
+    """
+    for e in entries:
+        if e.get("tier") == "full" and e.get("width"): return e["width"], e["height"]
+    return clip_size(ffmpeg, clip_path(entries[0]))
+
+def overlay_png(text, size, color, stroke):
+    """The text rendered once to a transparent PNG, cached by content under OVERLAY_DIR."""
+    key = hashlib.sha1(repr((text, size, color, stroke, OVERLAY_FONT)).encode()).hexdigest()[:16]
+    path = os.path.join(OVERLAY_DIR, f"{key}.png")
+    if os.path.exists(path): return path
+
+    from PIL import Image, ImageDraw, ImageFont
+    try: font = ImageFont.truetype(OVERLAY_FONT, size)
+    except OSError: font = ImageFont.load_default(size)
+    box = ImageDraw.Draw(Image.new("RGBA", (1, 1))).textbbox((0, 0), text, font=font, stroke_width=stroke)
+    img = Image.new("RGBA", (box[2] - box[0], box[3] - box[1]), (0, 0, 0, 0))
+    ImageDraw.Draw(img).text((-box[0], -box[1]), text, font=font, fill=color, stroke_width=stroke, stroke_fill="black")
+    os.makedirs(OVERLAY_DIR, exist_ok=True)
+    tmp = path + ".tmp.png"
+    img.save(tmp)
+    os.replace(tmp, path)
+    return path
+
+def encode_segment(job):
+    """Trim, overlay and retime one clip into its own mp4 of exactly `frames` frames. Every
+    segment gets identical codec settings, so the concat demuxer can join them without re-encoding."""
+    ffmpeg, src, length, overlay, x, y, speed, frames, (w, h), out, preset, threads = job
+    # fps=30 drops the last frame's interval, so the tail is padded with clones and cut to the count
+    graph = (f"[0:v]scale={w}:{h},setpts=(PTS-STARTPTS)/{speed:.6f}[clip];"
+             f"[clip][1:v]overlay={x}:{y},fps=30,tpad=stop_mode=clone:stop_duration=1,format=yuv420p[v]")
+    cmd = [ffmpeg, "-y", "-v", "error", "-t", f"{length:.3f}", "-i", src, "-i", overlay,
+           "-filter_complex", graph, "-map", "[v]", "-an", "-frames:v", str(frames),
+           "-c:v", "libx264", "-preset", preset, "-threads", str(threads), out]
+    subprocess.run(cmd, check=True)
+    return out
+
+def make_video_fast(preset=ENCODER_PRESET, threads=ENCODER_THREADS, workers=EDITOR_WORKERS):
+    """make_video's edit, done by ffmpeg: segments encoded in parallel, then stream-copied together."""
+    print("🎬 Starting 35s Strict-Edit (fast)...")
+    picked = pick_clips()
+    if not picked: return None, 0
+    hook, middle, final = picked
+    ffmpeg = ffmpeg_exe()
+    if not ffmpeg:
+        print("❌ Error: ffmpeg not found.")
         return None, 0
 
-    files.sort()
+    plan = [(hook, HOOK_TEXT, {})] + [(e, MONTAGE_TEXT, {"gen": e["generation"]}) for e in middle] + [(final, PAYOFF_TEXT, {})]
+    # The index knows each clip's length; only clips indexed without one get probed
+    lengths = [min(e["duration"] or clip_duration(ffmpeg, clip_path(e)), SEGMENT_MAX) for e, _, _ in plan]
+    speed = sum(lengths) / TARGET_DURATION
+    # Frames per segment from the rounded cut points, so they add up to exactly TARGET_DURATION
+    cuts = [round(t / speed * 30) for t in itertools.accumulate(lengths, initial=0)]
+    frame_size = output_size(ffmpeg, [e for e, _, _ in plan])
+    print(f"⚡ Precision Retiming: {sum(lengths):.2f}s -> {TARGET_DURATION}s (Speed: {speed:.2f}x)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = []
+        for i, ((e, (text, size, color, stroke, x, y), fields), length) in enumerate(zip(plan, lengths)):
+            jobs.append((ffmpeg, clip_path(e), length, overlay_png(text.format(**fields), size, color, stroke),
+                         x, y, speed, cuts[i + 1] - cuts[i], frame_size, os.path.join(tmp, f"seg_{i:02d}.mp4"), preset, threads))
+        with ThreadPool(max(1, min(workers, len(jobs)))) as pool: segments = pool.map(encode_segment, jobs)
+
+        playlist = os.path.join(tmp, "segments.txt")
+        with open(playlist, "w") as fh: fh.writelines(f"file '{s}'\n" for s in segments)
+        cmd = [ffmpeg, "-y", "-v", "error", "-f", "concat", "-safe", "0", "-i", playlist]
+        available_music = [m for m in MUSIC_OPTIONS if os.path.exists(m)]
+        if available_music:
+            chosen_song = random.choice(available_music)
+            print(f"🎵 DJ Selected: {chosen_song}")
+            cmd += ["-stream_loop", "-1", "-i", chosen_song, "-map", "0:v", "-map", "1:a", "-af", "volume=0.5", "-c:a", "aac"]
+        cmd += ["-c:v", "copy", "-t", f"{TARGET_DURATION}", "-movflags", "+faststart", OUTPUT_FILE]
+        subprocess.run(cmd, check=True)
+    return OUTPUT_FILE, final["generation"]
+
+def make_video(preset=ENCODER_PRESET, threads=ENCODER_THREADS):
+    print("🎬 Starting 35s Strict-Edit...")
+    picked = pick_clips()
+    if not picked: return None, 0
+    hook, middle, final = picked
+
+    import PIL.Image
+    if not hasattr(PIL.Image, 'ANTIALIAS'):
+        PIL.Image.ANTIALIAS = PIL.Image.LANCZOS
+    from moviepy.editor import VideoFileClip, TextClip, CompositeVideoClip, concatenate_videoclips, AudioFileClip, vfx
+    from moviepy.audio.fx.all import audio_loop
     
     # Strategy: 5s Hook + 25s Montage + 5s Payoff = 35s
-    clips = []
+    segments = []
+    sources = [] # Every reader opened, closed once the video is written
+    size = output_size(ffmpeg_exe(), [hook] + middle + [final])
+    def open_clip(entry):
+        sources.append(VideoFileClip(clip_path(entry)))
+        # Draft clips are half size: compose would show them as a small box on black
+        return sources[-1] if tuple(sources[-1].size) == size else sources[-1].resize(newsize=size)
     
     # 1. THE HOOK (Gen 0)
-    hook_clip = VideoFileClip(os.path.join(CLIPS_DIR, files[0]))
+    hook_clip = open_clip(hook)
     if hook_clip.duration > 5: hook_clip = hook_clip.subclip(0, 5)
     
     try:
@@ -63,30 +209,24 @@ def make_video():
         txt = txt.set_position(('center', 0.8), relative=True).set_duration(hook_clip.duration)
         hook_clip = CompositeVideoClip([hook_clip, txt])
     except Exception as e: print(f"Text Error: {e}")
-    clips.append(hook_clip)
+    segments.append(hook_clip)
 
     # 2. THE MONTAGE (Middle Gens)
-    middle_files = files[1:-1]
-    if len(middle_files) > 5:
-        random.shuffle(middle_files)
-        middle_files = middle_files[:5]
-    middle_files.sort()
-    
-    for f in middle_files:
-        c = VideoFileClip(os.path.join(CLIPS_DIR, f))
+    for entry in middle:
+        c = open_clip(entry)
         if c.duration > 5: c = c.subclip(0, 5)
         
-        gen_num = f.split('_')[1].split('.')[0]
+        gen_num = entry["generation"]
         try:
             txt = TextClip(f"Gen {gen_num}", fontsize=60, color='yellow', font='DejaVu-Sans-Bold', stroke_color='black', stroke_width=2)
             txt = txt.set_position(('left', 'top')).set_duration(c.duration)
             c = CompositeVideoClip([c, txt])
         except: pass
-        clips.append(c)
+        segments.append(c)
 
     # 3. THE PAYOFF (Final Gen)
-    final_clip = VideoFileClip(os.path.join(CLIPS_DIR, files[-1]))
-    last_gen_num = files[-1].split('_')[1].split('.')[0]
+    final_clip = open_clip(final)
+    last_gen_num = final["generation"]
     if final_clip.duration > 5: final_clip = final_clip.subclip(0, 5)
     
     try:
@@ -94,10 +234,10 @@ def make_video():
         txt = txt.set_position(('center', 'center')).set_duration(final_clip.duration)
         final_clip = CompositeVideoClip([final_clip, txt])
     except: pass
-    clips.append(final_clip)
+    segments.append(final_clip)
 
     # STITCH
-    final_video = concatenate_videoclips(clips, method="compose")
+    final_video = concatenate_videoclips(segments, method="compose")
 
     # STRICT TIMING CHECK (35.0s)
     current_duration = final_video.duration
@@ -118,11 +258,16 @@ def make_video():
         music = music.volumex(0.5)
         final_video = final_video.set_audio(music)
 
-    final_video.write_videofile(OUTPUT_FILE, fps=30, codec='libx264', audio_codec='aac', preset='medium', logger=None)
+    try: final_video.write_videofile(OUTPUT_FILE, fps=30, codec='libx264', audio_codec='aac', preset=preset, threads=threads or None, logger=None)
+    finally:
+        for c in sources: c.close()
     return OUTPUT_FILE, last_gen_num
 
 def upload_video(filename, last_gen):
     print("🚀 Connecting to YouTube API...")
+    from google.oauth2.credentials import Credentials
+    from googleapiclient.discovery import build
+    from googleapiclient.http import MediaFileUpload
     try:
         creds = Credentials(None, refresh_token=os.environ["YT_REFRESH_TOKEN"], token_uri="https://oauth2.googleapis.com/token", client_id=os.environ["YT_CLIENT_ID"], client_secret=os.environ["YT_CLIENT_SECRET"])
         youtube = build("youtube", "v3", credentials=creds)
@@ -144,8 +289,26 @@ def upload_video(filename, last_gen):
         print(f"❌ Upload Failed: {e}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cut the training clips into a 35s short.")
+    parser.add_argument("--dry-run", action="store_true", help="print which clips would be used, without loading moviepy")
+    parser.add_argument("--profile-imports", action="store_true", help="report what each deferred dependency costs to load, then exit")
+    parser.add_argument("--moviepy", action="store_true", help="edit through moviepy (decode + composite + one re-encode) instead of the ffmpeg fast path")
+    parser.add_argument("--preset", default=ENCODER_PRESET, help="libx264 preset")
+    parser.add_argument("--threads", type=int, default=ENCODER_THREADS, help="encoder threads per encode (0 = auto)")
+    parser.add_argument("--workers", type=int, default=EDITOR_WORKERS, help="segments encoded in parallel (fast path)")
+    args = parser.parse_args()
+    if args.profile_imports:
+        print("⏱️ Deferred imports:")
+        lazy.profile_imports(HEAVY_IMPORTS)
+        sys.exit()
+    if args.dry_run:
+        picked = pick_clips()
+        if picked: print(f"🎬 Hook: {picked[0]['file']}\n🎬 Montage: {', '.join(e['file'] for e in picked[1]) or '-'}\n🎬 Payoff: {picked[2]['file']}")
+        sys.exit()
+
     # 1. Make the video locally
-    output_path, generation_count = make_video()
+    if args.moviepy: output_path, generation_count = make_video(args.preset, args.threads)
+    else: output_path, generation_count = make_video_fast(args.preset, args.threads, args.workers)
     
     if output_path:
         print(f"✅ Video generated at: {output_path}")
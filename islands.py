@@ -0,0 +1,156 @@
+import os
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import sys
+import copy
+import json
+import queue
+import pickle
+import random
+import argparse
+import multiprocessing
+import neat
+import brain
+import champion
+import checkpoint
+import simulation
+
+# Island model: several independent populations, one process each, each with its own
+# species set, checkpoints and fitness cache. Every MIGRATE_EVERY generations each
+# island sends copies of its best genomes to the next island in a ring.
+#   python islands.py --islands 4 --generations 20
+ISLAND_DIR = "islands"
+ISLAND_SEED = 1000 # Island i seeds Python's random with ISLAND_SEED + i, or they'd all evolve alike
+MIGRATE_EVERY = 5
+MIGRANTS = 2
+MIGRATION_TIMEOUT = 600 # Seconds to wait for a neighbour before carrying on without its migrants
+
+def island_dir(index):
+    return os.path.join(ISLAND_DIR, f"island_{index}")
+
+def _evaluate(genomes, config):
+    """Headless training generation, as run_simulation does it when nothing is recorded."""
+    brain.GENERATION += 1
+    max_frames = brain.frame_budget(brain.GENERATION)
+    brain.cached_drive([g for _, g in genomes], max_frames, lambda todo: brain.eval_tracks(todo, config, max_frames))
+
+class IslandReporter(neat.reporting.BaseReporter):
+    """Sends each generation's stats to the main process and keeps copies of the island's best genomes."""
+    def __init__(self, index, results, migrants):
+        self.index = index
+        self.results = results
+        self.migrants = migrants
+        self.best = []
+
+    def post_evaluate(self, config, population, species, best_genome):
+        fitness = [g.fitness for g in population.values()]
+        ranked = sorted(population.values(), key=lambda g: g.fitness, reverse=True)
+        self.best = [copy.deepcopy(g) for g in ranked[:self.migrants]]
+        self.results.put(("generation", self.index, brain.GENERATION, max(fitness), sum(fitness) / len(fitness), len(species.species)))
+
+def migrate(p, config, index, inboxes, reporter):
+    """Ring migration: our best go to the next island, the previous island's best replace our newest children."""
+    inboxes[(index + 1) % len(inboxes)].put(reporter.best)
+    try: incoming = inboxes[index].get(timeout=MIGRATION_TIMEOUT)
+    except queue.Empty:
+        print(f"⚠️ Island {index}: no migrants after {MIGRATION_TIMEOUT}s, carrying on")
+        return
+    if not incoming: return # [-0:] below would be every key
+    # p.population is the next, not yet evaluated generation: the highest keys are its newest children
+    for key in sorted(p.population)[-len(incoming):]: del p.population[key]
+    for g in incoming:
+        g.key = next(p.reproduction.genome_indexer)
+        g.fitness = None
+        p.population[g.key] = g
+        p.reproduction.ancestors[g.key] = ()
+    p.species.speciate(config, p.population, p.generation)
+
+def _island(index, config_path, generations, migrate_every, migrants, inboxes, results):
+    try:
+        directory = island_dir(index)
+        os.makedirs(directory, exist_ok=True)
+        random.seed(ISLAND_SEED + index)
+        brain.FITNESS_CACHE = brain.FitnessCache(os.path.join(directory, "fitness_cache.json"))
+        config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation, config_path)
+        latest = checkpoint.latest(directory)
+        if latest:
+            path, brain.START_GEN = latest
+            p = checkpoint.restore(path, config)
+        else:
+            brain.START_GEN = 0
+            p = neat.Population(config)
+        brain.GENERATION = brain.START_GEN
+        brain.FINAL_GEN = brain.START_GEN + generations
+
+        checkpointer = checkpoint.CompactCheckpointer(directory, brain.CHECKPOINT_EVERY, brain.CHECKPOINT_KEEP, brain.CHECKPOINT_MILESTONE, brain.CHECKPOINT_BACKGROUND)
+        reporter = IslandReporter(index, results, migrants)
+        p.add_reporter(checkpointer)
+        p.add_reporter(reporter)
+        done = 0
+        try:
+            while done < generations:
+                chunk = min(migrate_every, generations - done)
+                p.run(_evaluate, chunk)
+                done += chunk
+                if done < generations and len(inboxes) > 1 and migrants: migrate(p, config, index, inboxes, reporter)
+        finally: checkpointer.flush()
+        results.put(("champion", index, p.best_genome))
+    except Exception as e:
+        results.put(("error", index, repr(e)))
+        raise
+
+def run_islands(islands, generations, migrate_every=MIGRATE_EVERY, migrants=MIGRANTS, config_path="config.txt"):
+    """Evolve `islands` populations in parallel. Returns (champion genome, island it came from)."""
+    for seed in brain.TRACK_SEEDS: simulation.load_track(seed) # Build the track cache before the islands race for it
+    inboxes = [multiprocessing.Queue() for _ in range(islands)]
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_island, args=(i, config_path, generations, migrate_every, migrants, inboxes, results))
+             for i in range(islands)]
+    for proc in procs: proc.start()
+
+    report = {"islands": islands, "migrate_every": migrate_every, "migrants": migrants, "generations": {}}
+    champions, finished = {}, 0
+    while finished < islands:
+        msg = results.get()
+        if msg[0] == "generation":
+            _, index, gen, best, mean, species = msg
+            row = report["generations"].setdefault(gen, {})
+            row[index] = {"best": best, "mean": round(mean, 2), "species": species}
+            if len(row) == islands:
+                top = max(row, key=lambda i: row[i]["best"])
+                print(f"🏝️ Gen {gen}: best {row[top]['best']} (island {top}) | " + " / ".join(f"{row[i]['best']}" for i in sorted(row)))
+        elif msg[0] == "champion":
+            champions[msg[1]] = msg[2]
+            finished += 1
+        else:
+            print(f"❌ Island {msg[1]} failed: {msg[2]}")
+            finished += 1
+    for proc in procs: proc.join()
+    if not champions: sys.exit("❌ Every island failed")
+
+    home = max(champions, key=lambda i: champions[i].fitness)
+    best = champions[home]
+    report["champion"] = {"island": home, "key": best.key, "fitness": best.fitness,
+                          "nodes": len(best.nodes), "connections": len(best.connections)}
+    report["island_champions"] = {i: g.fitness for i, g in sorted(champions.items())}
+    with open(os.path.join(ISLAND_DIR, "champion.pkl"), "wb") as f: pickle.dump(best, f)
+    config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet, neat.DefaultStagnation, config_path)
+    ranked = sorted(champions.values(), key=lambda g: g.fitness, reverse=True) # Every island's best, global champion first
+    champion.export(ranked, config, os.path.join(ISLAND_DIR, "champion.npz"))
+    with open(os.path.join(ISLAND_DIR, "report.json"), "w") as f: json.dump(report, f, indent=2)
+    print(f"🏆 Global champion: island {home}, fitness {best.fitness} -> {ISLAND_DIR}/champion.pkl (+ champion.npz)")
+    return best, home
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Island-model NEAT: independent populations per process with ring migration.")
+    parser.add_argument("--islands", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--generations", type=int, default=brain.DAILY_GENERATIONS)
+    parser.add_argument("--migrate-every", type=int, default=MIGRATE_EVERY)
+    parser.add_argument("--migrants", type=int, default=MIGRANTS, help="genomes sent per migration (0 = isolated islands)")
+    args = parser.parse_args()
+    if args.migrants < 0: parser.error("--migrants must be >= 0")
+    if args.migrate_every < 1: parser.error("--migrate-every must be >= 1")
+    brain.create_config_file()
+    os.makedirs(ISLAND_DIR, exist_ok=True)
+    run_islands(args.islands, args.generations, args.migrate_every, args.migrants)
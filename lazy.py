@@ -0,0 +1,39 @@
+import sys
+import time
+import importlib
+import importlib.util
+
+def lazy_import(name):
+    """Module `name`, only executed on first attribute access (importlib's LazyLoader).
+
+    Lets a script keep `module.thing` call sites while paying for the import only on
+    the code paths that actually use it.
+    """
+    if name in sys.modules: return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None: raise ImportError(f"No module named {name!r}", name=name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def profile_imports(names):
+    """Load each module in turn and print what it costs. Returns the total in seconds.
+
+    Anything an earlier module already pulled in is free, so order matters: list
+    modules in the order the program would first need them.
+    """
+    total = 0.0
+    for name in names:
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(name)
+            getattr(module, "__name__") # Makes a lazy module actually load
+            note = ""
+        except ImportError as e: note = f"  (not installed: {e.name})"
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        print(f"  {name:<28} {elapsed * 1000:8.1f} ms{note}")
+    print(f"  {'total':<28} {total * 1000:8.1f} ms")
+    return total
@@ -0,0 +1,82 @@
+import os
+import csv
+import json
+import time
+import neat
+
+PHASES = ["setup", "cache", "networks", "sensing", "inference", "physics", "gates", "drawing", "capture"]
+
+class PhaseTimer:
+    """Wall time per phase of a generation, accumulated with lap() calls.
+
+    mark() starts a segment and lap(name) books the time since the last mark/lap
+    to `name`, so a hot loop pays one perf_counter() per phase boundary. Disabled
+    (the default) every call returns straight away. Time between a lap() and the
+    next mark() isn't booked anywhere; the reporter shows it as "other".
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.last = 0.0
+        self.reset()
+
+    def reset(self):
+        self.totals = dict.fromkeys(PHASES, 0.0)
+
+    def mark(self):
+        if self.enabled: self.last = time.perf_counter()
+
+    def lap(self, phase):
+        if not self.enabled: return
+        now = time.perf_counter()
+        self.totals[phase] += now - self.last
+        self.last = now
+
+    def take(self):
+        """Totals so far, then start over (what a pool worker sends back with its chunk)."""
+        totals = self.totals
+        self.reset()
+        return totals
+
+    def add(self, totals):
+        for phase, t in totals.items(): self.totals[phase] += t
+
+class PhaseReporter(neat.reporting.BaseReporter):
+    """Prints a per-generation phase breakdown and appends it to a .csv or .jsonl file.
+
+    Pool workers' phase times are summed over workers, so with WORKERS > 1 they
+    can add up to more than the generation's wall time ("total"). `label` returns
+    the generation number to log (default: neat's 0-based index).
+    Rows have a "kind": "generation", or e.g. "render" for work done after training.
+    """
+    def __init__(self, timer, path=None, label=None):
+        self.timer = timer
+        self.path = path
+        self.label = label
+        self.generation = None
+        self.start = 0.0
+
+    def start_generation(self, generation):
+        self.generation = generation
+        self.timer.reset()
+        self.start = time.perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        generation = self.label() if self.label else self.generation
+        self.record(generation, len(population), time.perf_counter() - self.start, self.timer.take())
+
+    def record(self, generation, genomes, total, totals, kind="generation"):
+        row = {"kind": kind, "generation": generation, "genomes": genomes, "total": round(total, 4)}
+        row.update({phase: round(totals.get(phase, 0.0), 4) for phase in PHASES})
+        row["other"] = round(max(0.0, total - sum(totals.values())), 4)
+        print(f" ⏱️ {'' if kind == 'generation' else kind + ': '}" + "  ".join(f"{k} {v:.2f}s" for k, v in list(row.items())[3:] if v))
+        if self.path: self.write(row)
+
+    def write(self, row):
+        if self.path.endswith(".csv"):
+            new = not os.path.exists(self.path)
+            with open(self.path, "a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                if new: writer.writeheader()
+                writer.writerow(row)
+        else:
+            with open(self.path, "a") as f: f.write(json.dumps(row) + "\n")
@@ -0,0 +1,301 @@
+import os
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+import sys
+import glob
+import queue
+import threading
+import argparse
+import multiprocessing
+import numpy as np
+import pygame
+import simulation
+import clips
+
+# CONFIG
+REPLAY_DIR = "replays"
+FPS = 30
+HUD_COLOR = (200, 200, 200)
+LOD_TOP_K = int(os.environ.get("BRAIN_LOD_TOP_K", "40")) # Cars drawn with sprite/shadow/smoke in a full clip; the rest are dots
+DRAFT_TOP_K = int(os.environ.get("BRAIN_DRAFT_TOP_K", "10"))
+DRAFT_SCALE = 0.5
+HUD_FONT = ("consolas", 40)
+
+# RENDER TIERS: None = draw nothing; otherwise the output scale and the level-of-detail budget
+RENDER_TIERS = {
+    "none": None,
+    "draft": {"scale": DRAFT_SCALE, "top_k": DRAFT_TOP_K},
+    "full": {"scale": 1.0, "top_k": LOD_TOP_K},
+}
+
+def tier_size(tier):
+    """Video size for a tier (even, as yuv420p wants)."""
+    scale = RENDER_TIERS[tier]["scale"]
+    return int(simulation.WIDTH * scale) // 2 * 2, int(simulation.HEIGHT * scale) // 2 * 2
+
+def lod(progress, alive, top_k):
+    """Bool per car: draw in full (the top_k alive cars by progress), else as a marker."""
+    if top_k >= len(alive): return np.ones(len(alive), dtype=bool)
+    full = np.zeros(len(alive), dtype=bool)
+    full[np.argpartition(-np.where(alive, progress, -np.inf), top_k)[:top_k]] = True
+    return full
+
+class ReplayRecorder:
+    """Fixed-width per-frame log of one generation: car poses, speed, steering, alive, leader.
+
+    Arrays are preallocated for the frame budget and trimmed on save, so recording
+    is a handful of array copies per frame. Frame t is the state *after* step t.
+    """
+    def __init__(self, n, max_frames):
+        self.frames = 0
+        self.position = np.zeros((max_frames, n, 2), dtype=np.float32)
+        self.angle = np.zeros((max_frames, n), dtype=np.float32)
+        self.speed = np.zeros((max_frames, n), dtype=np.float32)
+        self.steering = np.zeros((max_frames, n), dtype=np.int8)
+        self.alive = np.zeros((max_frames, n), dtype=bool)
+        self.progress = np.zeros((max_frames, n), dtype=np.float32)
+        self.leader = np.zeros(max_frames, dtype=np.int16)
+
+    def record(self, fleet, leader, rows=slice(None)):
+        """Log the fleet's state. `rows` maps a compacted fleet back to car numbers."""
+        t = self.frames
+        self.position[t, rows] = fleet.position
+        self.angle[t, rows] = fleet.angle
+        self.speed[t, rows] = fleet.speed
+        self.steering[t, rows] = fleet.last_steering
+        self.alive[t, rows] = fleet.alive
+        self.progress[t, rows] = fleet.progress
+        self.leader[t] = leader
+        self.frames += 1
+
+    def save(self, path, seed, generation, tier="full", fitness=None):
+        t = self.frames
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, seed=seed, generation=generation, tier=tier, fitness=np.nan if fitness is None else fitness,
+                                position=self.position[:t], angle=self.angle[:t], speed=self.speed[:t],
+                                steering=self.steering[:t], alive=self.alive[:t], progress=self.progress[:t], leader=self.leader[:t])
+        os.replace(tmp, path)
+        return path
+
+def replay_path(generation):
+    return os.path.join(REPLAY_DIR, f"gen_{generation:05d}.npz")
+
+class FrameEncoder:
+    """imageio/ffmpeg writer on a background thread, fed from a few reusable frame buffers.
+
+    submit() copies the screen straight out of its pixel buffer (pixels3d is a view, so
+    this is the only copy) into a free preallocated (H, W, 3) array and queues it; the
+    simulation thread only waits when every buffer is still in flight. With
+    block=False a full pipeline drops the frame instead. Drops and encode failures
+    are counted and reported on close() rather than swallowed. A `size` smaller than
+    the screen (a draft tier) scales each frame down first, into one reused surface.
+    """
+    def __init__(self, path, fps=FPS, size=(simulation.WIDTH, simulation.HEIGHT), buffers=8, block=True):
+        self.path = path
+        self.size = tuple(size)
+        self._proxy = None
+        self.block = block
+        self.frames = 0
+        self.dropped = 0
+        self.failed = 0
+        self.error = None
+        self._free = queue.Queue()
+        for _ in range(buffers): self._free.put(np.empty((size[1], size[0], 3), dtype=np.uint8))
+        self._todo = queue.Queue()
+        import imageio # Only recording needs ffmpeg
+        # Tier sizes are even but not multiples of 16: no padding, so the file is exactly `size`
+        self._writer = imageio.get_writer(path, fps=fps, macro_block_size=1)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, screen):
+        try: buf = self._free.get(block=self.block)
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        if screen.get_size() != self.size:
+            if self._proxy is None: self._proxy = pygame.Surface(self.size, 0, screen)
+            screen = pygame.transform.smoothscale(screen, self.size, self._proxy)
+        pixels = pygame.surfarray.pixels3d(screen)
+        np.copyto(buf, pixels.transpose(1, 0, 2))
+        del pixels # Unlocks the surface
+        self._todo.put(buf)
+        self.frames += 1
+        return True
+
+    def _run(self):
+        while True:
+            buf = self._todo.get()
+            if buf is None: break
+            try: self._writer.append_data(buf)
+            except Exception as e:
+                self.failed += 1
+                self.error = self.error or e
+            self._free.put(buf)
+
+    def close(self):
+        self._todo.put(None)
+        self._thread.join()
+        try: self._writer.close()
+        except Exception as e:
+            self.failed += 1
+            self.error = self.error or e
+        if self.dropped or self.failed:
+            print(f"⚠️ {self.path}: {self.dropped} dropped, {self.failed} failed of {self.frames + self.dropped} frames ({self.error})")
+        return self.frames - self.failed
+
+class WorldView:
+    """The track's visual layer with skid marks baked in, blitted through the viewport only.
+
+    Skid marks are opaque, so drift_fx can draw them straight onto a private copy of
+    the visual map (pass `surface` as the skid surface). Each frame is then a single
+    opaque blit of the camera's rectangle instead of two full-layer blits, one of
+    them alpha-blended. reset() wipes the marks for the next generation.
+    """
+    def __init__(self, visual_map):
+        self.base = visual_map
+        self.surface = visual_map.copy()
+
+    def reset(self):
+        self.surface.blit(self.base, (0, 0))
+        return self.surface
+
+    def blit(self, screen, camera):
+        x, y = camera.camera.x, camera.camera.y
+        area = pygame.Rect(-x, -y, *screen.get_size()).clip(self.surface.get_rect())
+        screen.blit(self.surface, (max(x, 0), max(y, 0)), area=area)
+
+def draw_frame(screen, camera, world, cars, hud, font, detail=None):
+    """One frame. `detail` (bool per car, see lod()) picks full sprites vs markers; None = all full.
+
+    `hud` is text to render with `font`, or a Surface rendered already (Session.hud).
+    """
+    screen.fill(simulation.THEME["bg"])
+    world.blit(screen, camera)
+    for i, c in enumerate(cars): # Both draws cull anything off-screen
+        if detail is None or detail[i]: c.draw(screen, camera)
+        else: c.draw_marker(screen, camera)
+
+    # HUD
+    if isinstance(hud, str): hud = font.render(hud, True, HUD_COLOR)
+    screen.blit(hud, (20, 20))
+    pygame.display.flip()
+
+class Session:
+    """Everything a drawn generation needs that outlives it: display, font, HUD text,
+    world view and car fleet for one track. start() resets them for the next generation.
+    """
+    def __init__(self, track):
+        pygame.init()
+        self.track = track
+        self.screen = pygame.display.set_mode((simulation.WIDTH, simulation.HEIGHT))
+        self.font = pygame.font.SysFont(*HUD_FONT, bold=True)
+        self.world = WorldView(track.visual_map)
+        self.camera = simulation.Camera(simulation.WORLD_SIZE, simulation.WORLD_SIZE)
+        self.fleet = None
+        self._hud = (None, None)
+
+    def start(self, n):
+        """A fleet of n cars on the grid and a clean track (no skid marks). Returns the fleet."""
+        self.world.reset()
+        if self.fleet is None: self.fleet = simulation.CarFleet(n, self.track.start_pos, self.track.start_angle)
+        else: self.fleet.reset(n, self.track.start_pos, self.track.start_angle)
+        return self.fleet
+
+    def hud(self, text):
+        # The HUD only changes between generations: render it once, blit it every frame
+        if self._hud[0] != text: self._hud = (text, self.font.render(text, True, HUD_COLOR))
+        return self._hud[1]
+
+    def draw(self, cars, hud, detail=None):
+        draw_frame(self.screen, self.camera, self.world, cars, self.hud(hud), self.font, detail)
+
+_SESSION = None
+
+def session(track):
+    """This process's Session, rebuilt only when the track changes."""
+    global _SESSION
+    if _SESSION is None or _SESSION.track is not track: _SESSION = Session(track)
+    return _SESSION
+
+def render_replay(path, out_dir="training_clips", fps=FPS, tier=None):
+    """Turn one replay .npz into gen_XXXXX.mp4 in out_dir and add it to the clip library there.
+    Returns the video path.
+
+    `tier` overrides the render tier stored in the replay (older replays: full).
+    """
+    clip = _render(path, out_dir, fps, tier)
+    if not clip: return None
+    clips.ClipLibrary(out_dir).add(**clip)
+    return clip["path"]
+
+def _render(path, out_dir, fps, tier):
+    """render_replay() minus the indexing: the library entry for the clip, or None if its tier renders nothing."""
+    r = np.load(path)
+    generation = int(r["generation"])
+    position, angle, speed, steering, alive, leader = (r[k] for k in ("position", "angle", "speed", "steering", "alive", "leader"))
+    progress = r["progress"] if "progress" in r else None
+    fitness = float(r["fitness"]) if "fitness" in r and not np.isnan(r["fitness"]) else None
+    tier = tier or (str(r["tier"]) if "tier" in r else "full")
+    if RENDER_TIERS[tier] is None: return None
+    top_k = RENDER_TIERS[tier]["top_k"]
+
+    s = session(simulation.load_track(int(r["seed"])))
+    camera, world = s.camera, s.world
+
+    # The fleet is just a state holder here: its FleetCar views already know how to draw
+    fleet = s.start(alive.shape[1])
+    cars = fleet.cars
+    out_path = os.path.join(out_dir, clips.clip_name(generation))
+    encoder = FrameEncoder(out_path, fps, tier_size(tier))
+
+    for t in range(len(leader)):
+        # Camera follows the leader picked before the step, as it did live
+        camera.update(cars[leader[t]])
+        for i, c in enumerate(cars): c.is_leader = (i == leader[t])
+
+        # Skid marks/smoke are re-derived: drawn from the pre-move position with the new angle
+        drift = fleet.alive & (np.abs(steering[t]) > 0.8) & (speed[t] > 15)
+        for i in np.flatnonzero(drift):
+            simulation.drift_fx(world.surface, cars[i].particles, fleet.position[i], angle[t, i])
+
+        fleet.position[:] = position[t]
+        fleet.angle[:] = angle[t]
+        fleet.alive[:] = alive[t]
+        detail = lod(progress[t], alive[t], top_k) if progress is not None else None
+        s.draw(cars, f"GEN {generation}", detail)
+        encoder.submit(s.screen)
+
+    frames = encoder.close()
+    return {"path": out_path, "generation": generation, "duration": frames / fps, "size": encoder.size, "fitness": fitness, "tier": tier}
+
+def render_replays(paths, out_dir="training_clips", workers=1, tier=None):
+    """Render and index many replays, one generation per process. Returns the video paths."""
+    if workers <= 1 or len(paths) <= 1:
+        return [render_replay(p, out_dir, FPS, tier) for p in paths]
+    # spawn, not fork: every renderer wants its own clean SDL state
+    pool = multiprocessing.get_context("spawn").Pool(min(workers, len(paths)))
+    try:
+        rendered = pool.starmap(_render, [(p, out_dir, FPS, tier) for p in paths])
+    finally:
+        pool.close()
+        pool.join()
+    # Indexed here, one at a time: workers adding at once would overwrite each other's index.json
+    library = clips.ClipLibrary(out_dir)
+    for clip in filter(None, rendered): library.add(**clip)
+    return [clip and clip["path"] for clip in rendered]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render replay logs (.npz) into mp4 clips.")
+    parser.add_argument("replays", nargs="*", help=f"replay files (default: every {REPLAY_DIR}/*.npz)")
+    parser.add_argument("--out-dir", default="training_clips")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--tier", choices=[t for t in RENDER_TIERS if RENDER_TIERS[t]], help="override the tier stored in each replay")
+    args = parser.parse_args()
+
+    paths = args.replays or sorted(glob.glob(os.path.join(REPLAY_DIR, "*.npz")))
+    if not paths: sys.exit(f"❌ No replays found in {REPLAY_DIR}")
+    os.makedirs(args.out_dir, exist_ok=True)
+    for out in render_replays(paths, args.out_dir, args.workers, args.tier): print(f"🎬 Rendered {out}")
@@ -2,9 +2,10 @@ import pygame
 import math
 import os
 import random 
+import json
 import numpy as np
 from collections import deque
-from scipy.interpolate import splprep, splev
+import assets
 
 # --- THEME ---
 # High contrast for the AI (Black/White physics), Pretty for us
@@ -13,19 +14,15 @@ THEME = {"bg": (30,35,40), "road": (50,50,55), "wall": (200,20,20), "wall_alt":
 WIDTH, HEIGHT = 1080, 1920
 WORLD_SIZE = 4000
 SENSOR_LENGTH = 300
-
-def load_sprite(filename, scale_size=None):
-    path = os.path.join("assets", filename)
-    if os.path.exists(path):
-        try:
-            img = pygame.image.load(path).convert_alpha()
-            if scale_size: img = pygame.transform.scale(img, scale_size)
-            return img
-        except: pass
-    # Fallback
-    surf = pygame.Surface(scale_size if scale_size else (40,60), pygame.SRCALPHA)
-    pygame.draw.rect(surf, (0,0,255), (0,0,*scale_size))
-    return surf
+TRACK_CACHE_DIR = "track_cache"
+TRACK_CACHE_VERSION = 2 # Bump whenever generate_track output changes
+CENTERLINE_SAMPLES = 5000
+GATE_STEP = 70 # A gate every this many centerline samples
+RADAR_ANGLES = [-60, -30, 0, 30, 60]
+RADAR_MAX_STEPS = 32
+CULL_MARGIN = 60 # Rotated sprite half-diagonal + shadow offset, so culled cars are truly off-screen
+MARKER_COLOR = (0, 120, 255)
+MARKER_RADIUS = 6
 
 class Car:
     def __init__(self, start_pos, start_angle):
@@ -45,10 +42,8 @@ class Car:
         self.frames_since_gate = 0
         self.radars = [] 
         
-        # VISUALS
+        # VISUALS (sprites come from the shared assets atlas)
         self.particles = [] 
-        self.sprite_normal = load_sprite("car_normal.png", (50, 85))
-        self.sprite_leader = load_sprite("car_leader.png", (50, 85))
         self.is_leader = False
 
     def input_steer(self, left=False, right=False):
@@ -107,9 +102,17 @@ class Car:
         self.acceleration = 0
         self.steering = 0
 
-    def check_radar(self, map_mask):
+    def check_radar(self, map_mask, distance_field=None):
         self.radars.clear()
-        for degree in [-60, -30, 0, 30, 60]:
+        if distance_field is not None:
+            angles = np.array([[self.angle + degree for degree in RADAR_ANGLES]])
+            lengths = cast_rays(distance_field, np.array([[self.position.x, self.position.y]]), angles)[0]
+            for degree, length in zip(RADAR_ANGLES, lengths):
+                rad = math.radians(self.angle + degree)
+                check = self.position + pygame.math.Vector2(math.cos(rad), math.sin(rad)) * length
+                self.radars.append([(int(check.x), int(check.y)), length])
+            return
+        for degree in RADAR_ANGLES:
             length = 0
             rad = math.radians(self.angle + degree)
             vec = pygame.math.Vector2(math.cos(rad), math.sin(rad))
@@ -125,8 +128,10 @@ class Car:
 
     def draw(self, screen, camera):
         if not self.alive: return
+        view = screen.get_rect()
+        atlas = assets.get_atlas()
         
-        # Smoke
+        # Smoke (always ages, only blitted when on screen)
         for i in range(len(self.particles)-1,-1,-1):
             pos,life,size = self.particles[i]
             life-=1
@@ -134,22 +139,248 @@ class Car:
             if life<=0: self.particles.pop(i)
             else:
                 adj = camera.apply_point(pos)
-                s = pygame.Surface((size*2,size*2), pygame.SRCALPHA)
-                pygame.draw.circle(s, (200,200,200,int(life/20*100)), (size,size), size)
-                screen.blit(s, (adj[0]-size, adj[1]-size))
+                if not view.inflate(size*2, size*2).collidepoint(adj): continue
+                screen.blit(atlas.smoke(size, life), (adj[0]-size, adj[1]-size))
         
-        # F1 Car
-        img = self.sprite_leader if self.is_leader else self.sprite_normal
-        rot = pygame.transform.rotate(img, -self.angle - 90)
-        rect = rot.get_rect(center=camera.apply_point(self.position))
+        # F1 Car (pre-rotated frame from the atlas; off-screen cars skip the lookup)
+        center = camera.apply_point(self.position)
+        if not view.inflate(CULL_MARGIN*2, CULL_MARGIN*2).collidepoint(center): return
+        rot, shad = atlas.car(self.angle, self.is_leader)
+        rect = rot.get_rect(center=center)
         
         # Shadow
-        shad = pygame.transform.rotate(img, -self.angle - 90)
-        shad.fill((0,0,0,80), special_flags=pygame.BLEND_RGBA_MULT)
         screen.blit(shad, (rect.x+5, rect.y+5))
         
         screen.blit(rot, rect.topleft)
 
+    def draw_marker(self, screen, camera):
+        """Level-of-detail stand-in for draw(): one dot, no sprite, shadow or smoke."""
+        self.particles.clear()
+        if not self.alive: return
+        center = camera.apply_point(self.position)
+        if screen.get_rect().collidepoint(center): pygame.draw.circle(screen, MARKER_COLOR, center, MARKER_RADIUS)
+
+def mask_array(map_mask):
+    """NumPy (W, H) bool twin of a pygame.mask.Mask, indexed [x, y] like mask.get_at."""
+    return pygame.surfarray.array_red(map_mask.to_surface()) > 0
+
+def distance_field(mask):
+    """Distance (px) from every pixel to the nearest dead pixel of a mask_array().
+
+    Off-map counts as dead, same as the get_at IndexError in check_radar, so the
+    mask is padded with a dead border before the transform.
+    """
+    from scipy import ndimage # Only needed on a track cache miss
+    return ndimage.distance_transform_edt(np.pad(mask, 1))[1:-1, 1:-1].astype(np.float32)
+
+def cast_rays(field, origins, angles, max_length=SENSOR_LENGTH, max_steps=RADAR_MAX_STEPS):
+    """Sphere-trace many rays at once against a distance_field().
+
+    origins is (N, 2), angles is (N, R) in degrees. Each step jumps by the clearance
+    at the current pixel, so open road is crossed in a few lookups and the hit is
+    exact to the pixel instead of quantized to 21px. Returns (N, R) lengths, capped
+    at max_length; a ray grazing a wall that runs out of steps reports how far it got.
+    """
+    rad = np.radians(angles)
+    dx, dy = np.cos(rad), np.sin(rad)
+    ox, oy = origins[:, 0:1], origins[:, 1:2]
+    w, h = field.shape
+    length = np.zeros(angles.shape)
+    active = np.ones(angles.shape, dtype=bool)
+    for _ in range(max_steps):
+        x = (ox + dx * length).astype(int)
+        y = (oy + dy * length).astype(int)
+        inside = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+        clearance = np.zeros(angles.shape, dtype=np.float32)
+        clearance[inside] = field[x[inside], y[inside]]
+        active &= (clearance > 0) & (length < max_length)
+        if not active.any(): break
+        # Step a pixel short of the wall (pixel centres vs. truncated coords), never less than 1px
+        length[active] += np.maximum(clearance[active] - 1, 1)
+    return np.minimum(length, max_length)
+
+def drift_fx(skid_surface, particles, position, angle):
+    """Tire tracks + a chance of smoke for one drifting car (same look as Car.update)."""
+    pos = pygame.math.Vector2(*position)
+    offset_L = pygame.math.Vector2(-20, -15).rotate(angle)
+    offset_R = pygame.math.Vector2(-20, 15).rotate(angle)
+    pygame.draw.circle(skid_surface, (20,20,20), (int(pos.x+offset_L.x), int(pos.y+offset_L.y)), 4)
+    pygame.draw.circle(skid_surface, (20,20,20), (int(pos.x+offset_R.x), int(pos.y+offset_R.y)), 4)
+    if random.random() < 0.3:
+        particles.append([pos + offset_L, random.randint(10, 20), random.randint(5, 12)])
+
+def _row(name):
+    # Property that reads/writes row `index` of one of the fleet's arrays
+    return property(lambda self: getattr(self.fleet, name)[self.index],
+                    lambda self, v: getattr(self.fleet, name).__setitem__(self.index, v))
+
+class FleetCar:
+    """Thin view over one CarFleet row so Camera, check_radar and draw keep working."""
+    def __init__(self, fleet, index):
+        self.fleet = fleet
+        self.index = index
+        self.radars = []
+
+        # VISUALS
+        self.particles = []
+        self.is_leader = False
+
+    angle = _row("angle")
+    speed = _row("speed")
+    steering = _row("steering")
+    acceleration = _row("acceleration")
+    alive = _row("alive")
+    distance_traveled = _row("distance_traveled")
+    gates_passed = _row("gates_passed")
+    next_gate_idx = _row("next_gate_idx")
+    frames_since_gate = _row("frames_since_gate")
+
+    @property
+    def position(self): return pygame.math.Vector2(*self.fleet.position[self.index])
+    @property
+    def velocity(self): return pygame.math.Vector2(*self.fleet.velocity[self.index])
+
+    input_steer = Car.input_steer
+    input_gas = Car.input_gas
+    check_radar = Car.check_radar
+    draw = Car.draw
+    draw_marker = Car.draw_marker
+
+class CarFleet:
+    """Struct-of-arrays physics: every car in the population advances in one vectorized tick.
+
+    Same rules, same float ops in the same order as Car.update, so a fleet of N
+    scores exactly like N Car objects. `cars` holds a FleetCar view per row, built on first use.
+    reset() starts a new generation in the same buffers, so a long run allocates them once.
+    """
+    # Per-car arrays: name -> (extra dims, dtype)
+    FIELDS = {"position": ((2,), float), "velocity": ((2,), float), "angle": ((), float), "acceleration": ((), float),
+              "steering": ((), float), "speed": ((), float), "alive": ((), bool), "distance_traveled": ((), float),
+              "gates_passed": ((), int), "next_gate_idx": ((), int), "frames_since_gate": ((), int),
+              "radar": ((len(RADAR_ANGLES),), float), "last_steering": ((), float), "progress": ((), float)}
+
+    def __init__(self, n, start_pos, start_angle):
+        self.max_speed = 30
+        self.friction = 0.96
+        self.turn_speed = 0.2
+        self.capacity = 0
+        self._buffers = {}
+        self._views = [] # FleetCar per buffer row, kept across resets
+        self.reset(n, start_pos, start_angle)
+
+    def reset(self, n, start_pos, start_angle):
+        """Every car back on the grid for a new generation of n (buffers only grow)."""
+        if n > self.capacity:
+            self._buffers = {name: np.zeros((n,) + dims, dtype=dtype) for name, (dims, dtype) in self.FIELDS.items()}
+            self.capacity = n
+        for name, buf in self._buffers.items():
+            view = buf[:n] # compact() swaps these for copies; the buffers stay intact
+            view.fill(0)
+            setattr(self, name, view)
+        self.position[:] = start_pos
+        self.angle[:] = float(start_angle)
+        self.alive[:] = True
+        self.n = n
+        self._cars = None
+        return self
+
+    @property
+    def cars(self):
+        # Views are only built once something wants to draw or follow a car
+        if self._cars is None:
+            self._views += [FleetCar(self, i) for i in range(len(self._views), self.n)]
+            self._cars = self._views[:self.n]
+            for i, c in enumerate(self._cars):
+                c.index = i
+                c.radars = []
+                c.particles.clear()
+                c.is_leader = False
+        return self._cars
+
+    def compact(self):
+        """Drop dead rows in place (views of surviving cars are kept and re-pointed).
+
+        Returns the kept row indices so callers can remap per-car bookkeeping.
+        """
+        keep = np.flatnonzero(self.alive)
+        for name in self.FIELDS:
+            setattr(self, name, getattr(self, name)[keep])
+        if self._cars is not None:
+            self._cars = [self._cars[i] for i in keep]
+            for i, c in enumerate(self._cars): c.index = i
+        self.n = len(keep)
+        return keep
+
+    def check_radar(self, field):
+        """All alive cars' radars in one cast_rays() call. Fills self.radar (N, 5) in px."""
+        live = self.alive
+        if live.any():
+            angles = self.angle[live][:, None] + np.array(RADAR_ANGLES, dtype=float)
+            self.radar[live] = cast_rays(field, self.position[live], angles)
+        return self.radar
+
+    def check_gates(self, checkpoints):
+        """Vectorized Car.check_gates. Returns a bool array of cars that just hit their next gate."""
+        gates = np.asarray(checkpoints, dtype=float)
+        target = gates[self.next_gate_idx % len(gates)]
+        d = self.position - target
+        hit = self.alive & (np.sqrt(d[:, 0]*d[:, 0] + d[:, 1]*d[:, 1]) < 250)
+        self.gates_passed[hit] += 1
+        self.next_gate_idx[hit] += 1
+        self.frames_since_gate[hit] = 0
+        return hit
+
+    def check_progress(self, centerline):
+        """Continuous distance along the track for every car (one KD-tree query). Fills self.progress."""
+        self.progress[:] = centerline.progress(self.position, self.next_gate_idx)
+        return self.progress
+
+    def update(self, mask, skid_surface=None):
+        """Vectorized Car.update. `mask` is the bool array from mask_array()."""
+        self.frames_since_gate[self.alive] += 1
+        self.alive &= self.frames_since_gate <= 90
+        idx = np.flatnonzero(self.alive)
+        if len(idx) == 0: return
+
+        vel = self.velocity[idx] * self.friction
+        rad = np.radians(self.angle[idx])
+        acc = self.acceleration[idx]
+        vel[:, 0] += np.cos(rad) * acc
+        vel[:, 1] += np.sin(rad) * acc
+        speed = np.sqrt(vel[:, 0]*vel[:, 0] + vel[:, 1]*vel[:, 1])
+        fast = speed > self.max_speed
+        vel[fast] *= (self.max_speed / speed[fast])[:, None]
+
+        moving = speed > 2
+        angle = self.angle[idx]
+        angle[moving] += self.steering[idx][moving] * speed[moving] * self.turn_speed
+        self.angle[idx] = angle
+
+        # DRIFT VISUALS (Only if skid_surface is provided) - rare, so a plain loop is fine
+        if skid_surface:
+            drift = moving & (np.abs(self.steering[idx]) > 0.8) & (speed > 15)
+            for i in idx[drift]:
+                drift_fx(skid_surface, self.cars[i].particles, self.position[i], self.angle[i])
+
+        pos = self.position[idx] + vel
+        self.position[idx] = pos
+        self.velocity[idx] = vel
+        self.speed[idx] = speed
+        self.distance_traveled[idx] += speed
+
+        # COLLISION: off the map counts as a crash, same as mask.get_at raising
+        x = pos[:, 0].astype(int)
+        y = pos[:, 1].astype(int)
+        inside = (x >= 0) & (x < mask.shape[0]) & (y >= 0) & (y < mask.shape[1])
+        on_road = np.zeros(len(idx), dtype=bool)
+        on_road[inside] = mask[x[inside], y[inside]]
+        self.alive[idx] = on_road
+
+        self.acceleration[idx] = 0
+        self.last_steering[:] = 0
+        self.last_steering[idx] = self.steering[idx] # Kept for replays; steering itself resets
+        self.steering[idx] = 0
+
 class Camera:
     def __init__(self, width, height):
         self.camera = pygame.Rect(0, 0, width, height)
@@ -167,8 +398,15 @@ class Camera:
         self.camera = pygame.Rect(int(x), int(y), self.width, self.height)
 
 class TrackGenerator:
-    def __init__(self, seed): np.random.seed(seed)
+    def __init__(self, seed):
+        # Own RNG, so building a track never touches (or depends on) global NumPy state.
+        # RandomState, not default_rng: same stream as the old np.random.seed, same circuits.
+        self.rng = np.random.RandomState(seed)
+        self.mask = None # Filled by generate_track: mask_array of the physics layer
+        self.distance_field = None # Filled by generate_track for cast_rays
+        self.centerline = None # Filled by generate_track: the spline samples as a Centerline
     def generate_track(self):
+        from scipy.interpolate import splprep, splev # Only needed on a track cache miss
         phys_surf = pygame.Surface((WORLD_SIZE, WORLD_SIZE))
         vis_surf = pygame.Surface((WORLD_SIZE, WORLD_SIZE))
         skid_surf = pygame.Surface((WORLD_SIZE, WORLD_SIZE), pygame.SRCALPHA) # Added Layer
@@ -180,16 +418,16 @@ class TrackGenerator:
         points = []
         for i in range(20): 
             angle = (i/20) * 2 * math.pi
-            r = np.random.randint(1100, 1800)
+            r = self.rng.randint(1100, 1800)
             points.append((WORLD_SIZE//2 + r*math.cos(angle), WORLD_SIZE//2 + r*math.sin(angle)))
         points.append(points[0]) 
 
         pts = np.array(points)
         tck, u = splprep(pts.T, u=None, s=0.0, per=1)
-        u_new = np.linspace(u.min(), u.max(), 5000)
+        u_new = np.linspace(u.min(), u.max(), CENTERLINE_SAMPLES)
         x_new, y_new = splev(u_new, tck, der=0)
         smooth = list(zip(x_new, y_new))
-        checkpoints = smooth[::70]
+        checkpoints = smooth[::GATE_STEP]
 
         # Physics (White road on Black bg)
         pygame.draw.lines(phys_surf, (255,255,255), True, smooth, 450)
@@ -202,6 +440,111 @@ class TrackGenerator:
             pygame.draw.circle(vis_surf, THEME["road"], (int(p[0]), int(p[1])), 230)
         
         start_angle = math.degrees(math.atan2(y_new[5]-y_new[0], x_new[5]-x_new[0]))
+
+        # Radar field comes from the same mask the collision test uses, so sensors and deaths agree
+        self.mask = mask_array(pygame.mask.from_surface(phys_surf))
+        self.distance_field = distance_field(self.mask)
+        self.centerline = Centerline(smooth)
         
         # RETURN 6 ITEMS (Brain needs to unpack 6)
         return (int(x_new[0]), int(y_new[0])), phys_surf, vis_surf, skid_surf, checkpoints, start_angle
+
+
+class Centerline:
+    """The track's spline samples with cumulative arc length and a KD-tree over them.
+
+    progress() turns car positions into distance driven along the track in one
+    query: the nearest sample's arc length, unwrapped around the car's next gate so
+    it keeps counting up lap after lap (and goes down if a car turns back).
+    """
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=float)
+        seg = np.linalg.norm(np.roll(self.points, -1, axis=0) - self.points, axis=1)
+        self.arc = np.concatenate([[0.0], np.cumsum(seg[:-1])])
+        self.length = seg.sum()
+        self.gate_arc = self.arc[::GATE_STEP]
+        from scipy.spatial import cKDTree
+        self.tree = cKDTree(self.points)
+
+    def locate(self, positions):
+        """(arc length of the nearest sample, distance from the centerline) per position."""
+        dist, idx = self.tree.query(positions)
+        return self.arc[idx], dist
+
+    def progress(self, positions, next_gate_idx):
+        s, _ = self.locate(positions)
+        gates = len(self.gate_arc)
+        target = self.gate_arc[next_gate_idx % gates] + (next_gate_idx // gates) * self.length
+        # Cars are always within half a lap of their next gate
+        return target + (s - target + self.length / 2) % self.length - self.length / 2
+
+# --- TRACK CACHE ---
+# A seed always builds the same circuit, so build it once per process and keep
+# the expensive parts on disk: mask/field as raw .npy (memory-mapped on load),
+# the visual layer as a PNG that is only decoded when something gets drawn.
+_TRACKS = {}
+
+class Track:
+    """One seeded circuit: collision mask, radar field, centerline, gates, start pose and visual layer."""
+    def __init__(self, seed, start_pos, start_angle, checkpoints, mask, field, centerline, visual_map=None, visual_path=None):
+        self.seed = seed
+        self.start_pos = start_pos
+        self.start_angle = start_angle
+        self.checkpoints = checkpoints
+        self.mask = mask
+        self.distance_field = field
+        self.centerline = centerline
+        self._visual_map = visual_map
+        self._visual_path = visual_path
+
+    @property
+    def visual_map(self):
+        if self._visual_map is None:
+            img = pygame.image.load(self._visual_path)
+            self._visual_map = img.convert() if pygame.display.get_surface() else img
+        return self._visual_map
+
+def _track_dir(seed, cache_dir):
+    return os.path.join(cache_dir, f"track_{seed}_v{TRACK_CACHE_VERSION}") # Stale versions never block a rebuild
+
+def _save_track(track, cache_dir):
+    path = _track_dir(track.seed, cache_dir)
+    tmp = path + f".tmp{os.getpid()}"
+    os.makedirs(tmp, exist_ok=True)
+    np.save(os.path.join(tmp, "mask.npy"), track.mask)
+    np.save(os.path.join(tmp, "field.npy"), track.distance_field)
+    np.save(os.path.join(tmp, "centerline.npy"), track.centerline.points)
+    pygame.image.save(track.visual_map, os.path.join(tmp, "visual.png"))
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"version": TRACK_CACHE_VERSION, "start_pos": list(track.start_pos), "start_angle": track.start_angle,
+                   "checkpoints": [[float(x), float(y)] for x, y in track.checkpoints]}, f)
+    try: os.replace(tmp, path)
+    except OSError: # Another process got there first
+        for name in os.listdir(tmp): os.remove(os.path.join(tmp, name))
+        os.rmdir(tmp)
+
+def _load_track(seed, cache_dir):
+    path = _track_dir(seed, cache_dir)
+    try:
+        with open(os.path.join(path, "meta.json")) as f: meta = json.load(f)
+    except (OSError, ValueError): return None
+    if meta.get("version") != TRACK_CACHE_VERSION: return None
+    return Track(seed, tuple(meta["start_pos"]), meta["start_angle"], [tuple(c) for c in meta["checkpoints"]],
+                 np.load(os.path.join(path, "mask.npy"), mmap_mode="r"),
+                 np.load(os.path.join(path, "field.npy"), mmap_mode="r"),
+                 Centerline(np.load(os.path.join(path, "centerline.npy"))),
+                 visual_path=os.path.join(path, "visual.png"))
+
+def load_track(seed, cache_dir=TRACK_CACHE_DIR):
+    """The Track for `seed`: from this process's memo, else the disk cache, else generated (and saved)."""
+    if seed in _TRACKS: return _TRACKS[seed]
+    track = _load_track(seed, cache_dir) if cache_dir else None
+    if track is None:
+        gen = TrackGenerator(seed)
+        start_pos, _, visual_map, _, checkpoints, start_angle = gen.generate_track()
+        track = Track(seed, start_pos, start_angle, checkpoints, gen.mask, gen.distance_field, gen.centerline, visual_map=visual_map)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            _save_track(track, cache_dir)
+    _TRACKS[seed] = track
+    return track